@@ -0,0 +1,142 @@
+import numpy as np
+
+from solver.material import get_elasticity_matrix
+from solver.fea_math import compute_element_stress, nodal_stress
+from solver.fea_solver import ProgressReporter, ShaftModel
+from mesh.generate_mesh import generate_shaft_mesh
+
+# Per iteration, an element may shrink by at most MAX_REFINEMENT and grow by at most MAX_COARSENING
+MAX_REFINEMENT = 4.0
+MAX_COARSENING = 2.0
+
+
+def solve_adaptive(params, progress=None):
+    """
+    Solve on a coarse uniform mesh of params["element_size"], estimate the error of
+    each element and remesh with a size field that equidistributes it, until the
+    estimated relative error is below params["target_error"] (default 0.05), the
+    mesh reaches params["max_dofs"] (default 200000) or params["max_iterations"]
+    (default 5) solves have run. Elements are never made smaller than
+    params["min_element_size"] (default element_size / 20).
+    Returns the result dict of the final solve, with one entry per iteration
+    (DOFs, elements, estimated error, peak stress) under "adaptive".
+    """
+    log = ProgressReporter(progress).log
+    target_error = params.get("target_error", 0.05)
+    max_dofs = params.get("max_dofs", 200000)
+    max_iterations = params.get("max_iterations", 5)
+    max_size = params["element_size"]
+    min_size = params.get("min_element_size", max_size / 20)
+    element_order = params.get("element_order", 1)
+    D = get_elasticity_matrix(params["E"], params["nu"])
+
+    mesh = None  # The first solve meshes uniformly from params (and may hit the mesh cache)
+    iterations = []
+    for iteration in range(1, max_iterations + 1):
+        model = ShaftModel(params, mesh)
+        try:
+            result = model.solve(progress)
+            points, cells, _ = model.stage("mesh")
+            geometry = model.stage("geometry")
+            U, _ = model.stage("displacement")
+        finally:
+            model.close()
+
+        _, sigma = compute_element_stress(cells, U, D, geometry)
+        _, nodal_sigma = nodal_stress(cells, sigma, geometry.volumes > 0, len(points), return_tensor=True)
+        element_error, error = estimate_error(cells, sigma, nodal_sigma, geometry.volumes, D)
+        corners = cells[:, :4]  # TET10 meshes are refined through their corner nodes
+
+        iterations.append({
+            "iteration": iteration,
+            "num_dofs": result["num_dofs"],
+            "num_elements": result["num_elements"],
+            "error": error,
+            "max_von_mises": result["max_von_mises"],
+            "max_displacement": result["max_displacement"],
+        })
+        log(f"[✓] Adaptive iteration {iteration}: {result['num_dofs']} DOFs, {result['num_elements']} elements, "
+            f"estimated error {100 * error:.2f}%, max von Mises {result['max_von_mises']:.4e} Pa")
+
+        if error <= target_error:
+            log(f"[✓] Adaptive refinement converged to {100 * error:.2f}% (target {100 * target_error:.2f}%)")
+            break
+        if result["num_dofs"] >= max_dofs:
+            log(f"[!] Adaptive refinement stopped at the DOF budget ({max_dofs}), error {100 * error:.2f}%")
+            break
+        if len(iterations) > 1 and iterations[-2]["num_elements"] == result["num_elements"] \
+                and iterations[-2]["num_dofs"] == result["num_dofs"]:
+            log("[!] Adaptive refinement stalled: remeshing did not change the mesh")
+            break
+        if iteration == max_iterations:
+            log(f"[!] Adaptive refinement stopped after {max_iterations} iterations, error {100 * error:.2f}%")
+            break
+
+        max_elements = max_dofs * len(cells) / (3 * len(points))
+        sizes = refined_sizes(corners, geometry.volumes, element_error, error, target_error, len(points),
+                              max_elements, min_size, max_size, order=element_order)
+        log(f"[✓] Remeshing with element sizes {sizes.min():.4g} to {sizes.max():.4g} m")
+        mesh = generate_shaft_mesh(length=params["length"], radius=params["radius"], element_size=max_size,
+                                   in_process=True, log=log, size_field=(points, corners, sizes),
+                                   element_order=element_order)
+
+    result["adaptive"] = iterations
+    return result
+
+
+def estimate_error(cells, sigma, nodal_sigma, volumes, D):
+    """
+    Zienkiewicz-Zhu error estimate from the difference between the element stresses
+    sigma, constant (num_elements, 6) or at the TET10 nodes (num_elements, 10, 6), and
+    the recovered, nodal-averaged stress field nodal_sigma (N, 6), measured in the
+    energy norm. For TET10 both fields are compared at the corner nodes.
+    Returns the error of each element and the relative error eta / sqrt(|u|^2 + eta^2)
+    of the whole mesh.
+    """
+    C = np.linalg.inv(D)  # Compliance
+    corner_sigma = sigma[:, :4] if sigma.ndim == 3 else np.broadcast_to(sigma[:, None, :], (len(cells), 4, 6))
+    diff = nodal_sigma[cells[:, :4]] - corner_sigma  # shape (num_elements, 4, 6)
+
+    element_error2 = _integrate_linear_energy(diff, C, volumes)
+    energy = _integrate_linear_energy(corner_sigma, C, volumes).sum()
+    error2 = element_error2.sum()
+    relative_error = float(np.sqrt(error2 / (energy + error2))) if energy + error2 > 0 else 0.0
+    return np.sqrt(element_error2), relative_error
+
+
+def _integrate_linear_energy(values, C, volumes):
+    # Exact integral of s^T C s for s interpolated linearly from its corner values over a tet:
+    # V / 20 * (sum_a s_a^T C s_a + (sum_a s_a)^T C (sum_a s_a))
+    nodal_terms = np.einsum("eai,ij,eaj->e", values, C, values)
+    values_sum = values.sum(axis=1)
+    return volumes / 20 * (nodal_terms + np.einsum("ei,ij,ej->e", values_sum, C, values_sum))
+
+
+def refined_sizes(cells, volumes, element_error, relative_error, target_error, num_nodes, max_elements,
+                  min_size, max_size, order=1):
+    """
+    Target element sizes at the nodes of the current mesh for the next one.
+
+    Every element should carry the same share of the allowed error,
+    target_error * sqrt(|u|^2 + eta^2) / sqrt(num_elements); the energy-norm error
+    scales with h^order for elements of the given order, and h is rescaled accordingly. Sizes are
+    then scaled up uniformly if the predicted element count exceeds max_elements.
+    """
+    sizes = (6 * np.sqrt(2) * volumes) ** (1 / 3)  # Edge length of a regular tet of the same volume
+
+    total_error = np.sqrt(np.sum(element_error**2))
+    allowed = target_error * total_error / max(relative_error, 1e-12) / np.sqrt(len(cells))
+    ratio = np.divide(allowed, element_error, out=np.full(len(cells), MAX_COARSENING), where=element_error > 0)
+    new_sizes = sizes * np.clip(ratio ** (1 / order), 1 / MAX_REFINEMENT, MAX_COARSENING)
+
+    valid = volumes > 0
+    predicted_elements = np.sum((sizes[valid] / new_sizes[valid]) ** 3)
+    if predicted_elements > max_elements:
+        new_sizes *= (predicted_elements / max_elements) ** (1 / 3)
+    new_sizes = np.clip(new_sizes, min_size, max_size)
+
+    # The smallest size of the elements around each node
+    nodal_sizes = np.full(num_nodes, np.inf)
+    np.minimum.at(nodal_sizes, cells[valid], new_sizes[valid, None])
+    nodal_sizes[np.isinf(nodal_sizes)] = max_size
+    return nodal_sizes
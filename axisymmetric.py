@@ -0,0 +1,306 @@
+import numpy as np
+import scipy.sparse as sp
+
+from solver.fea_math import apply_boundary_conditions, average_at_nodes, von_mises
+from solver.fea_solver import ProgressReporter, _count_nonzeros, _print_solve_info, _solver_options, _storage_bytes
+from solver.linear_solver import Factorization
+from solver.result_io import ResultMesh, write_results
+from solver.instrumentation import finish_stats, make_recorder
+
+# Segments around the circumference when the r-z solution is revolved into a 3D mesh for viewing
+DEFAULT_SEGMENTS = 32
+
+# Fewest triangle rows across the radius. Linear triangles are too stiff in torsion
+# on coarse r-z meshes (the end twist is 25% low with 2 rows, under 1% with 8), and
+# the 2D system stays small, so the 3D element size only sets an upper bound.
+MIN_RADIAL_DIVISIONS = 8
+
+# Two-point Gauss rule on [0, 1], exact for the cubic integrands of the edge loads
+_GAUSS_POINTS = np.array([0.5 - 0.5 / np.sqrt(3), 0.5 + 0.5 / np.sqrt(3)])
+_GAUSS_WEIGHTS = np.array([0.5, 0.5])
+
+
+def solve_axisymmetric(params, progress=None):
+    """
+    Solve an axial and/or torsion load case on a structured r-z triangle mesh
+    of the shaft cross-section instead of a 3D tet mesh.
+
+    Each node carries (u_r, u_z, u_theta): the meridional displacements and,
+    decoupled from them for an isotropic material, the torsional one. The axial
+    load is a uniform traction and the torque a shear traction T r / J on the
+    top face. The solution is revolved into a 3D tet mesh with
+    params["axisymmetric_segments"] segments (default 32) for the visualizer.
+    Returns the same dict as solve_fea, with "model": "axisymmetric". As in 3D
+    runs, num_nodes, num_elements and num_dofs describe the written (revolved)
+    mesh, while reduced_dofs is the size of the system actually solved; the 2D
+    model's own sizes are under "axisymmetric_nodes", "axisymmetric_elements"
+    and "axisymmetric_dofs".
+    """
+    recorder = make_recorder(params)
+    reporter = ProgressReporter(progress, recorder)
+    log = reporter.log
+    if params.get("element_order", 1) != 1:
+        log(f"[!] element_order {params['element_order']} is ignored by the axisymmetric solver, which uses "
+            f"linear triangles; set axisymmetric to False for quadratic tets")
+
+    reporter.stage("mesh")
+    nodes, triangles, face_nodes = axisymmetric_mesh(params["length"], params["radius"], params["element_size"])
+    total_dofs = len(nodes) * 3
+    log(f"[✓] Axisymmetric mesh: {len(nodes)} nodes, {len(triangles)} triangles")
+
+    reporter.stage("assemble")
+    log("[✓] Assembling axisymmetric stiffness matrix...")
+    D = axisymmetric_elasticity_matrix(params["E"], params["nu"])
+    geometry = triangle_geometry(nodes, triangles)
+    K = assemble_axisymmetric_stiffness(triangles, geometry, D, len(nodes))
+
+    reporter.stage("bc")
+    log("[✓] Applying boundary conditions...")
+    F = axisymmetric_load_vector(nodes, face_nodes["top"], params["load_type"], params["load_value"],
+                                 params["radius"])
+    K_reduced, F_reduced, free_dofs = apply_boundary_conditions(K, F, axisymmetric_fixed_dofs(nodes, face_nodes))
+    log(f"System size before BC: {total_dofs} DOFs")
+    log(f"System size after BC: {K_reduced.shape[0]} DOFs")
+
+    reporter.stage("solve")
+    log("[✓] Solving system...")
+    factorization = Factorization(K_reduced, **_solver_options(params))
+    U_reduced, solve_info = factorization.solve(F_reduced)
+    solve_info["time"] += factorization.factor_time
+    _print_solve_info(solve_info, log)
+    U = np.zeros(total_dofs)
+    U[free_dofs] = U_reduced
+    U = U.reshape(-1, 3)  # u_r, u_z, u_theta
+
+    reporter.stage("stress")
+    log("[✓] Computing von Mises stress...")
+    sigma = axisymmetric_element_stress(triangles, geometry, D, U)
+    valid = geometry["area"] > 0
+    nodal_von_mises = average_at_nodes(triangles, von_mises(sigma), valid, len(nodes))
+
+    reporter.stage("write")
+    points, cells, node_index, theta = revolve_mesh(nodes, triangles,
+                                                    params.get("axisymmetric_segments", DEFAULT_SEGMENTS))
+    u_r, u_z, u_theta = U[node_index].T
+    cos, sin = np.cos(theta), np.sin(theta)
+    displacement = np.column_stack([u_r * cos - u_theta * sin, u_r * sin + u_theta * cos, u_z])
+    point_data = {"Displacement": displacement, "Von_Mises": nodal_von_mises[node_index]}
+    if params.get("stress_tensor", False):
+        nodal_sigma = average_at_nodes(triangles, sigma, valid, len(nodes))
+        point_data["Stress"] = cartesian_stress(nodal_sigma[node_index], theta)
+
+    summary = {
+        "num_nodes": len(points),
+        "num_elements": len(cells),
+        "num_dofs": len(points) * 3,
+        "reduced_dofs": K_reduced.shape[0],
+        "axisymmetric_nodes": len(nodes),
+        "axisymmetric_elements": len(triangles),
+        "axisymmetric_dofs": total_dofs,
+        "max_displacement": float(np.max(np.linalg.norm(displacement, axis=1))),
+        "max_von_mises": float(np.max(nodal_von_mises)),
+    }
+    output_file = write_results(params.get("output_dir", "output"), points, cells, point_data,
+                                params, params.get("output_format", "vtu"), summary=summary)
+    log(f"[✓] FEA completed and results saved to {output_file}")
+
+    reporter.finish()
+    # Same mesh sizes as the summary; nnz and stiffness_mb describe the 2D system, like reduced_dofs
+    stats = finish_stats(recorder, params, log, **{name: value for name, value in summary.items()
+                                                   if name.endswith(("_nodes", "_elements", "_dofs"))},
+                         nnz=_count_nonzeros(K), stiffness_mb=_storage_bytes(K) / 1024**2)
+
+    return {"output_file": output_file, **summary, "solver": solve_info, "stats": stats, "model": "axisymmetric",
+            "result_mesh": ResultMesh(points, cells, point_data)}
+
+
+def axisymmetric_mesh(length, radius, element_size):
+    """
+    Structured mesh of the r-z half cross-section [0, radius] x [0, length], each
+    quad split into two triangles. The spacing is element_size, refined to at
+    least MIN_RADIAL_DIVISIONS across the radius, in both directions. Returns
+    nodes (N, 2) as (r, z), triangles (M, 3) and face_nodes with the "top" and
+    "bottom" node indices.
+    """
+    spacing = min(element_size, radius / MIN_RADIAL_DIVISIONS)
+    nr = int(np.ceil(radius / spacing - 1e-9))
+    nz = max(2, int(np.ceil(length / spacing - 1e-9)))
+    r, z = np.meshgrid(np.linspace(0.0, radius, nr + 1), np.linspace(0.0, length, nz + 1))
+    nodes = np.column_stack([r.ravel(), z.ravel()])
+
+    index = np.arange(len(nodes)).reshape(nz + 1, nr + 1)
+    lower_left, lower_right = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+    upper_left, upper_right = index[1:, :-1].ravel(), index[1:, 1:].ravel()
+    triangles = np.concatenate([
+        np.column_stack([lower_left, lower_right, upper_right]),
+        np.column_stack([lower_left, upper_right, upper_left]),
+    ])
+    return nodes, triangles, {"top": index[-1], "bottom": index[0]}
+
+
+def axisymmetric_elasticity_matrix(E, nu):
+    """
+    D for the strains (e_r, e_z, e_theta, g_rz, g_rtheta, g_ztheta).
+    """
+    factor = E / ((1 + nu) * (1 - 2 * nu))
+    G = E / (2 * (1 + nu))
+    D = np.zeros((6, 6))
+    D[:3, :3] = factor * nu
+    D[[0, 1, 2], [0, 1, 2]] = factor * (1 - nu)
+    D[3, 3] = D[4, 4] = D[5, 5] = G
+    return D
+
+
+def triangle_geometry(nodes, triangles):
+    """
+    Area, centroid radius and strain-displacement matrices B (M, 6, 9) of every
+    triangle, for the DOFs (u_r, u_z, u_theta) of its three nodes. B is evaluated
+    at the centroid, where every shape function equals 1/3.
+    """
+    r, z = nodes[triangles, 0], nodes[triangles, 1]
+    # Linear shape functions N_i = (a_i + b_i r + c_i z) / (2A)
+    b = np.roll(z, -1, axis=1) - np.roll(z, -2, axis=1)
+    c = np.roll(r, -2, axis=1) - np.roll(r, -1, axis=1)
+    double_area = np.sum(r * b, axis=1)
+    area = np.abs(double_area) / 2
+    r_centroid = r.mean(axis=1)
+
+    valid = area > 1e-14
+    area[~valid] = 0.0
+    dN_dr = np.divide(b, double_area[:, None], out=np.zeros_like(b), where=valid[:, None])
+    dN_dz = np.divide(c, double_area[:, None], out=np.zeros_like(c), where=valid[:, None])
+    N_over_r = np.divide(1.0 / 3.0, r_centroid, out=np.zeros_like(r_centroid), where=r_centroid > 0)[:, None]
+
+    B = np.zeros((len(triangles), 6, 9))
+    B[:, 0, 0::3] = dN_dr                # e_r = du_r/dr
+    B[:, 1, 1::3] = dN_dz                # e_z = du_z/dz
+    B[:, 2, 0::3] = N_over_r             # e_theta = u_r/r
+    B[:, 3, 0::3] = dN_dz                # g_rz = du_r/dz + du_z/dr
+    B[:, 3, 1::3] = dN_dr
+    B[:, 4, 2::3] = dN_dr - N_over_r     # g_rtheta = du_theta/dr - u_theta/r
+    B[:, 5, 2::3] = dN_dz                # g_ztheta = du_theta/dz
+    return {"area": area, "r": r_centroid, "B": B}
+
+
+def assemble_axisymmetric_stiffness(triangles, geometry, D, num_nodes):
+    """
+    Assemble the axisymmetric stiffness matrix as CSR; each element integrates over its ring volume 2 pi r A.
+    """
+    B = geometry["B"]
+    ke = np.einsum("eji,jk,ekl->eil", B, D, B, optimize=True)
+    ke *= (2 * np.pi * geometry["r"] * geometry["area"])[:, None, None]
+
+    dofs = (triangles[:, :, None] * 3 + np.arange(3)).reshape(len(triangles), -1)
+    rows = np.repeat(dofs, 9, axis=1).ravel()
+    cols = np.tile(dofs, (1, 9)).ravel()
+    num_dofs = num_nodes * 3
+    return sp.coo_matrix((ke.ravel(), (rows, cols)), shape=(num_dofs, num_dofs)).tocsr()
+
+
+def axisymmetric_fixed_dofs(nodes, face_nodes):
+    """
+    All DOFs of the fixed bottom face, plus u_r and u_theta on the axis.
+    """
+    bottom = face_nodes["bottom"]
+    axis = np.flatnonzero(nodes[:, 0] == 0.0)
+    return np.unique(np.concatenate([bottom * 3, bottom * 3 + 1, bottom * 3 + 2, axis * 3, axis * 3 + 2]))
+
+
+def axisymmetric_load_vector(nodes, top_nodes, load_type, load_value, radius):
+    """
+    Consistent nodal loads of a uniform axial traction P / (pi R^2) and a torsional
+    shear traction T r / J on the top face, integrated over 2 pi r dr.
+    """
+    F = np.zeros(len(nodes) * 3)
+    top_nodes = top_nodes[np.argsort(nodes[top_nodes, 0])]
+    r1, r2 = nodes[top_nodes[:-1], 0], nodes[top_nodes[1:], 0]
+
+    for part in load_type.split("+"):
+        part = part.strip().lower()
+        if part == "axial":
+            traction = lambda r: np.full_like(r, load_value.get("axial", 0.0) / (np.pi * radius**2))
+            component = 1
+        elif part == "torsion":
+            J = np.pi * radius**4 / 2
+            traction = lambda r: load_value.get("torsion", 0.0) * r / J
+            component = 2
+        elif part == "bending":
+            raise ValueError("Bending loads are not axisymmetric, use the 3D solver")
+        else:
+            raise ValueError(f"Invalid load component '{part}' in load_type '{load_type}'")
+
+        for s, w in zip(_GAUSS_POINTS, _GAUSS_WEIGHTS):
+            r = r1 + s * (r2 - r1)
+            load = w * (r2 - r1) * traction(r) * 2 * np.pi * r
+            np.add.at(F, top_nodes[:-1] * 3 + component, (1 - s) * load)
+            np.add.at(F, top_nodes[1:] * 3 + component, s * load)
+    return F
+
+
+def axisymmetric_element_stress(triangles, geometry, D, U):
+    """
+    Stress of every triangle in the order (r, z, theta, rz, rtheta, ztheta), shape (M, 6).
+    """
+    u_e = U[triangles].reshape(len(triangles), 9)
+    return np.einsum("eij,ej->ei", geometry["B"], u_e) @ D.T
+
+
+def revolve_mesh(nodes, triangles, segments=DEFAULT_SEGMENTS):
+    """
+    Revolve the r-z mesh about the z-axis into a 3D tet mesh.
+    Returns points, tets, the r-z node of every point and its angle theta.
+
+    Every wedge swept by a triangle is split into three tets, with the diagonal
+    of each quad face running from its lower-numbered node at angle k to its
+    higher-numbered node at angle k + 1, so that neighbouring wedges conform.
+    Nodes on the axis are not duplicated; tets that collapse there are dropped.
+    """
+    on_axis = nodes[:, 0] == 0.0
+    angles = np.arange(segments) * 2 * np.pi / segments
+
+    # 3D point index of r-z node i at angle k
+    point_index = np.empty((len(nodes), segments), dtype=np.int64)
+    num_axis = int(on_axis.sum())
+    point_index[on_axis] = np.arange(num_axis)[:, None]
+    point_index[~on_axis] = num_axis + np.arange((~on_axis).sum() * segments).reshape(-1, segments)
+
+    node_index = np.empty(num_axis + (~on_axis).sum() * segments, dtype=np.int64)
+    theta = np.zeros(len(node_index))
+    node_index[point_index[on_axis, 0]] = np.flatnonzero(on_axis)
+    node_index[point_index[~on_axis].ravel()] = np.repeat(np.flatnonzero(~on_axis), segments)
+    theta[point_index[~on_axis].ravel()] = np.tile(angles, (~on_axis).sum())
+
+    r, z = nodes[node_index, 0], nodes[node_index, 1]
+    points = np.column_stack([r * np.cos(theta), r * np.sin(theta), z])
+
+    a, b, c = np.sort(triangles, axis=1).T
+    k = np.arange(segments)
+    k_next = (k + 1) % segments
+    tets = []
+    for corners in (((a, k), (b, k), (c, k), (c, k_next)),
+                    ((a, k), (b, k), (b, k_next), (c, k_next)),
+                    ((a, k), (a, k_next), (b, k_next), (c, k_next))):
+        tets.append(np.stack([point_index[node][:, angle].ravel() for node, angle in corners], axis=1))
+    tets = np.concatenate(tets)
+
+    # Drop tets with a repeated (axis) point
+    sorted_tets = np.sort(tets, axis=1)
+    keep = np.all(sorted_tets[:, 1:] != sorted_tets[:, :-1], axis=1)
+    return points, tets[keep], node_index, theta
+
+
+def cartesian_stress(sigma, theta):
+    """
+    Rotate cylindrical stresses (r, z, theta, rz, rtheta, ztheta) at angle theta into
+    Cartesian Voigt order (xx, yy, zz, xy, yz, zx).
+    """
+    s_r, s_z, s_t, t_rz, t_rt, t_zt = sigma.T
+    c, s = np.cos(theta), np.sin(theta)
+    return np.column_stack([
+        s_r * c**2 + s_t * s**2 - 2 * t_rt * s * c,
+        s_r * s**2 + s_t * c**2 + 2 * t_rt * s * c,
+        s_z,
+        (s_r - s_t) * s * c + t_rt * (c**2 - s**2),
+        t_rz * s + t_zt * c,
+        t_rz * c - t_zt * s,
+    ])
@@ -0,0 +1,211 @@
+"""
+Headless batch runner for parametric shaft sweeps.
+
+Usage:
+    python batch.py sweep.json --workers 4 --output-dir output/batch
+
+A JSON sweep file holds fixed "base" params and a "sweep" of lists that are
+expanded as a Cartesian product; "load" entries are dicts with load_type,
+load_value and optionally bending_pos:
+
+    {
+        "base": {"E": 2e11, "nu": 0.3},
+        "sweep": {
+            "radius": [0.05, 0.1],
+            "length": [0.5, 1.0],
+            "element_size": [0.02, 0.01],
+            "load": [
+                {"load_type": "axial", "load_value": {"axial": 1000.0}},
+                {"load_type": "bending+torsion", "load_value": {"bending": 500.0, "torsion": 200.0},
+                 "bending_pos": {"x": 0.0, "y": 0.05}}
+            ]
+        }
+    }
+
+A JSON file may instead list explicit "cases" (each merged over "base"). A CSV
+sweep file has one case per row with columns length, radius, E, nu,
+element_size, load_type, axial, bending, torsion, bending_x, bending_y.
+"""
+import argparse
+import contextlib
+import csv
+import itertools
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from solver.instrumentation import STAGES
+
+DEFAULT_PARAMS = {
+    "length": 1.0,
+    "radius": 0.1,
+    "E": 2e11,
+    "nu": 0.3,
+    "element_size": 0.02,
+    "load_type": "axial",
+    "load_value": {"axial": 1000.0, "bending": 0.0, "torsion": 0.0},
+    "bending_pos": {"x": 0.0, "y": 0.0},
+}
+
+SUMMARY_COLUMNS = [
+    "case", "status", "length", "radius", "element_size", "E", "nu", "load_type",
+    "axial", "bending", "torsion", "num_nodes", "num_elements", "num_dofs",
+    "reduced_dofs", "nnz", "stiffness_mb", "max_displacement", "max_von_mises", "time_s",
+    *[f"{stage}_s" for stage in STAGES],
+    "peak_rss_mb", "output_file", "error",
+]
+
+
+def load_sweep(path):
+    """
+    Read a JSON or CSV sweep definition and return the list of case params.
+    Only static cases can be swept: the summary columns are static results.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="") as f:
+            return [_params_from_csv_row(row) for row in csv.DictReader(f)]
+
+    with open(path) as f:
+        sweep = json.load(f)
+
+    base = {**DEFAULT_PARAMS, **sweep.get("base", {})}
+    if "cases" in sweep:
+        cases = [{**base, **case} for case in sweep["cases"]]
+    else:
+        axes = sweep.get("sweep", {})
+        names = list(axes)
+        cases = []
+        for values in itertools.product(*(axes[name] for name in names)):
+            params = dict(base)
+            for name, value in zip(names, values):
+                if name == "load":
+                    params.update(value)
+                else:
+                    params[name] = value
+            cases.append(params)
+
+    for case_id, params in enumerate(cases):
+        analysis = params.get("analysis", "static")
+        if analysis != "static":
+            raise ValueError(f"Invalid analysis '{analysis}' in case {case_id}, expected 'static'")
+    return cases
+
+
+def _params_from_csv_row(row):
+    params = dict(DEFAULT_PARAMS)
+    for name in ("length", "radius", "E", "nu", "element_size"):
+        if row.get(name):
+            params[name] = float(row[name])
+    if row.get("load_type"):
+        params["load_type"] = row["load_type"]
+    params["load_value"] = {name: float(row.get(name) or 0.0) for name in ("axial", "bending", "torsion")}
+    params["bending_pos"] = {"x": float(row.get("bending_x") or 0.0), "y": float(row.get("bending_y") or 0.0)}
+    return params
+
+
+def run_case(case_id, params, output_dir):
+    """
+    Solve one case in its own output directory, logging to solve.log there.
+    Never raises: failures are reported in the returned summary row.
+    """
+    case_dir = os.path.join(output_dir, f"case_{case_id:04d}")
+    os.makedirs(case_dir, exist_ok=True)
+    params = {**params, "output_dir": case_dir, "instrument": True,
+              "stats_file": os.path.join(case_dir, "stats.json")}
+
+    row = {
+        "case": case_id,
+        "length": params["length"],
+        "radius": params["radius"],
+        "element_size": params["element_size"],
+        "E": params["E"],
+        "nu": params["nu"],
+        "load_type": params["load_type"],
+        **{name: params["load_value"].get(name, 0.0) for name in ("axial", "bending", "torsion")},
+    }
+
+    start = time.perf_counter()
+    with open(os.path.join(case_dir, "solve.log"), "w") as log, contextlib.redirect_stdout(log):
+        try:
+            from solver.fea_solver import solve_fea
+
+            result = solve_fea(params)
+            # Inside the try, so a result without some column fails the case rather than the worker
+            row.update(_result_columns(result), status="ok")
+        except Exception as e:
+            traceback.print_exc(file=log)
+            row.update(status="failed", error=f"{type(e).__name__}: {e}")
+    row["time_s"] = time.perf_counter() - start
+
+    with open(os.path.join(case_dir, "params.json"), "w") as f:
+        json.dump(params, f, indent=2)
+    return row
+
+
+def _result_columns(result):
+    columns = {name: result[name] for name in (
+        "num_nodes", "num_elements", "num_dofs", "reduced_dofs", "max_displacement", "max_von_mises", "output_file")}
+    stats = result["stats"]
+    if stats is not None:
+        columns["nnz"] = stats["counters"]["nnz"]
+        columns["stiffness_mb"] = stats["counters"]["stiffness_mb"]
+        columns["peak_rss_mb"] = max(stage["peak_rss_mb"] or 0.0 for stage in stats["stages"].values())
+        columns.update({f"{stage}_s": values["wall_s"] for stage, values in stats["stages"].items()})
+    return columns
+
+
+def run_batch(cases, output_dir="output/batch", workers=None):
+    """
+    Fan cases out over a process pool and return the summary rows in case order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_case, case_id, params, output_dir): case_id
+                   for case_id, params in enumerate(cases)}
+        for future in as_completed(futures):
+            case_id = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:  # The worker process itself died, e.g. out of memory
+                row = {"case": case_id, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+            rows.append(row)
+            mark = "✓" if row["status"] == "ok" else "!"
+            print(f"[{mark}] Case {case_id} {row['status']} ({len(rows)}/{len(cases)})"
+                  + (f": {row['error']}" if row["status"] != "ok" else f" in {row['time_s']:.2f} s"))
+
+    rows.sort(key=lambda row: row["case"])
+    return rows
+
+
+def write_summary(rows, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parametric sweep of shaft FEA cases.")
+    parser.add_argument("sweep", help="sweep definition (.json or .csv)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--output-dir", default="output/batch", help="root directory for per-case output")
+    parser.add_argument("--summary", default=None, help="summary CSV path (default: <output-dir>/summary.csv)")
+    args = parser.parse_args()
+
+    cases = load_sweep(args.sweep)
+    print(f"[✓] Running {len(cases)} cases")
+    rows = run_batch(cases, args.output_dir, args.workers)
+
+    summary_path = args.summary or os.path.join(args.output_dir, "summary.csv")
+    write_summary(rows, summary_path)
+
+    failed = sum(row["status"] != "ok" for row in rows)
+    print(f"[✓] {len(rows) - failed} cases succeeded, {failed} failed; summary written to {summary_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,402 @@
+"""
+Benchmark and scaling suite for the mesh -> assemble -> solve -> stress pipeline.
+
+Usage:
+    python benchmark.py                                  # default ladder, print report
+    python benchmark.py --save-baseline bench_baseline.json
+    python benchmark.py --baseline bench_baseline.json --threshold 1.25
+    python benchmark.py --order-study                    # linear vs quadratic tets in bending
+
+Every element size of the ladder is solved in a fresh process, so that peak RSS
+is per level. The report lists per-stage wall time and memory and fits scaling
+exponents t ~ DOFs^k. Axial, torsion and cantilever-bending results are checked
+against closed-form solutions. The exit code is non-zero when a stage is slower
+than threshold x baseline or an accuracy check exceeds its tolerance.
+
+--order-study solves a cantilever in bending with linear and quadratic (TET10)
+elements over --order-sizes and reports DOFs, time, and the errors of the tip
+deflection and of the mid-span bending stress against beam theory.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from solver.instrumentation import STAGES
+
+DEFAULT_SIZES = [0.05, 0.03, 0.02, 0.015, 0.01, 0.0075, 0.005]
+DEFAULT_ORDER_SIZES = [0.05, 0.04, 0.03, 0.02]
+
+BASE_PARAMS = {
+    "length": 1.0,
+    "radius": 0.1,
+    "E": 2e11,
+    "nu": 0.3,
+    "load_type": "axial+bending+torsion",
+    "load_value": {"axial": 1000.0, "bending": 1000.0, "torsion": 1000.0},
+    "bending_pos": {"x": 0.0, "y": 0.0},
+    "output_format": "npz",
+    "instrument": True,
+    # Time every solve instead of reopening stored results
+    "result_store": False,
+}
+
+# Relative error tolerances against the closed-form solutions. Linear tets are
+# stiff in bending, hence the looser bound there. Torsion is checked on quadratic
+# elements (about 2% off at 0.02 m); linear tets are about 10% too stiff there,
+# which leaves no margin for any bound that would still catch a real regression.
+ACCURACY_TOLERANCES = {"axial": 0.05, "torsion": 0.05, "bending": 0.15}
+
+# Stages faster than this are too noisy to flag as regressions
+MIN_COMPARED_SECONDS = 0.05
+
+
+def run_level(params):
+    """
+    Solve one ladder level and return its sizes and per-stage stats.
+    """
+    from solver.fea_solver import solve_fea
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        result = solve_fea({**params, "output_dir": output_dir})
+
+    stats = result["stats"]
+    return {
+        "element_size": params["element_size"],
+        "num_dofs": result["num_dofs"],
+        "reduced_dofs": result["reduced_dofs"],
+        "num_elements": result["num_elements"],
+        "nnz": stats["counters"]["nnz"],
+        "stiffness_mb": stats["counters"]["stiffness_mb"],
+        "solver": result["solver"]["backend"],
+        "stages": stats["stages"],
+        "total_wall_s": stats["total_wall_s"],
+        "peak_rss_mb": max(stage["peak_rss_mb"] or 0.0 for stage in stats["stages"].values()),
+    }
+
+
+def run_ladder(params, sizes):
+    # A fresh process per level so that peak RSS isn't carried over between levels. Unlike
+    # Pool processes, executor processes aren't daemonic and may start element-loop workers.
+    context = multiprocessing.get_context("spawn")
+    levels = []
+    for size in sizes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            level = executor.submit(run_level, {**params, "element_size": size}).result()
+        print(f"[✓] element_size={size}: {level['reduced_dofs']} DOFs, {level['total_wall_s']:.2f} s, "
+              f"peak RSS {level['peak_rss_mb']:.0f} MiB")
+        levels.append(level)
+    return levels
+
+
+def fit_scaling(levels):
+    """
+    Least-squares exponent k of t ~ DOFs^k for each stage and the total.
+    """
+    dofs = [level["reduced_dofs"] for level in levels]
+    if len(set(dofs)) < 2:
+        return {}
+    log_dofs = np.log(dofs)
+    exponents = {}
+    for stage in (*STAGES, "total"):
+        times = [level["total_wall_s"] if stage == "total" else level["stages"][stage]["wall_s"]
+                 for level in levels]
+        if min(times) > 0:
+            exponents[stage] = float(np.polyfit(log_dofs, np.log(times), 1)[0])
+    return exponents
+
+
+def check_accuracy(params):
+    """
+    Compare axial extension, twist and tip deflection with closed-form solutions.
+    The twist is measured as the twist rate over the middle half of the shaft, clear
+    of the end zones at the clamp and the loaded face (Saint-Venant), on quadratic
+    elements, and reported as the equivalent end twist.
+    Returns {case: {"fea", "exact", "rel_error", "tolerance", "passed"}}.
+    """
+    from solver.fea_solver import load_shaft_mesh, solve_load_cases
+
+    L, R, E, nu = params["length"], params["radius"], params["E"], params["nu"]
+    P, T = 1000.0, 1000.0
+    G = E / (2 * (1 + nu))
+    A = np.pi * R**2
+    I = np.pi * R**4 / 4
+    J = np.pi * R**4 / 2
+    shear_coefficient = 6 * (1 + nu) / (7 + 6 * nu)  # Timoshenko, solid circular section
+
+    cases = [
+        {"name": "axial", "load_type": "axial", "load_value": {"axial": P}},
+        {"name": "bending", "load_type": "bending", "load_value": {"bending": P}, "bending_pos": {"x": 0.0, "y": 0.0}},
+    ]
+    results = {case["name"]: case for case in solve_load_cases(params, cases)}
+    torsion_params = {**params, "element_order": 2}
+    torsion, = solve_load_cases(torsion_params, [{"name": "torsion", "load_type": "torsion",
+                                                  "load_value": {"torsion": T}}])
+
+    _, _, face_nodes = load_shaft_mesh(params)
+    top = face_nodes["top"]
+    u_axial = results["axial"]["displacement"][top]
+    u_bending = results["bending"]["displacement"][top]
+
+    points, _, _ = load_shaft_mesh(torsion_params)
+    x, y, z = points.T
+    r2 = x**2 + y**2
+    u_torsion = torsion["displacement"]
+    middle = (np.abs(z - L / 2) <= L / 4) & (r2 > (0.5 * R)**2)
+    rotation = (x * u_torsion[:, 1] - y * u_torsion[:, 0])[middle] / r2[middle]
+    twist_rate = np.polyfit(z[middle], rotation, 1)[0]
+
+    measured = {
+        "axial": float(np.mean(u_axial[:, 2])),
+        "torsion": float(twist_rate * L),
+        "bending": float(np.mean(u_bending[:, 1])),
+    }
+    exact = {
+        "axial": P * L / (E * A),
+        "torsion": T * L / (G * J),
+        "bending": P * L**3 / (3 * E * I) + P * L / (shear_coefficient * G * A),
+    }
+    measured.update(_axisymmetric_measurements(params, P, T))
+    exact["axial (axisymmetric)"] = exact["axial"]
+    exact["torsion (axisymmetric)"] = T * L / (G * J)
+
+    report = {}
+    for name, value in measured.items():
+        rel_error = abs(value - exact[name]) / abs(exact[name])
+        tolerance = ACCURACY_TOLERANCES[name.split()[0]]
+        report[name] = {
+            "fea": value,
+            "exact": exact[name],
+            "rel_error": rel_error,
+            "tolerance": tolerance,
+            "passed": rel_error <= tolerance,
+        }
+    return report
+
+
+def _axisymmetric_measurements(params, P, T):
+    """
+    Axial extension and end twist of the 2D axisymmetric solver, measured on its revolved 3D output.
+    """
+    from solver.fea_solver import solve_fea
+
+    measured = {}
+    for name, load_value in (("axial", {"axial": P}), ("torsion", {"torsion": T})):
+        with tempfile.TemporaryDirectory() as output_dir:
+            result = solve_fea({**params, "load_type": name, "load_value": load_value, "axisymmetric": True,
+                                "output_dir": output_dir, "output_format": "npz", "instrument": False})
+        points, _, point_data = result["result_mesh"]
+        u = point_data["Displacement"]
+        top = np.isclose(points[:, 2], params["length"])
+        x, y = points[top, 0], points[top, 1]
+        r2 = x**2 + y**2
+        outer = r2 > (0.5 * params["radius"])**2
+        if name == "axial":
+            measured["axial (axisymmetric)"] = float(np.mean(u[top, 2]))
+        else:
+            measured["torsion (axisymmetric)"] = float(np.mean(((x * u[top, 1] - y * u[top, 0])[outer] / r2[outer])))
+    return measured
+
+
+def run_order_level(params):
+    """
+    Solve a tip-loaded cantilever and return DOFs, time and the errors of the tip
+    deflection and the peak mid-span bending stress against beam theory.
+    """
+    from solver.fea_solver import solve_fea
+
+    L, R, E, nu = params["length"], params["radius"], params["E"], params["nu"]
+    P = params["load_value"]["bending"]
+    G = E / (2 * (1 + nu))
+    I = np.pi * R**4 / 4
+    shear_coefficient = 6 * (1 + nu) / (7 + 6 * nu)  # Timoshenko, solid circular section
+    deflection = P * L**3 / (3 * E * I) + P * L / (shear_coefficient * G * np.pi * R**2)
+    stress = P * (L / 2) * R / I  # Outer fibre at mid-span, away from the clamp and the load
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        result = solve_fea({**params, "output_dir": output_dir, "output_format": "npz"})
+    points, _, point_data = result["result_mesh"]
+    u = point_data["Displacement"]
+    top = np.isclose(points[:, 2], L)
+    mid_span = np.abs(points[:, 2] - L / 2) <= params["element_size"] / 2
+
+    fea_deflection = float(np.mean(u[top, 1]))
+    fea_stress = float(np.max(point_data["Von_Mises"][mid_span]))
+    return {
+        "element_order": params.get("element_order", 1),
+        "element_size": params["element_size"],
+        "reduced_dofs": result["reduced_dofs"],
+        "total_wall_s": result["stats"]["total_wall_s"],
+        "deflection_error": abs(fea_deflection - deflection) / deflection,
+        "stress_error": abs(fea_stress - stress) / stress,
+    }
+
+
+def run_order_study(params, sizes):
+    """
+    Run run_order_level for linear and quadratic elements at every size, each in a fresh process.
+    """
+    params = {**params, "load_type": "bending", "load_value": {"bending": 1000.0},
+              "bending_pos": {"x": 0.0, "y": 0.0}, "axisymmetric": False}
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for order in (1, 2):
+        for size in sizes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                row = executor.submit(run_order_level, {**params, "element_order": order,
+                                                        "element_size": size}).result()
+            print(f"[✓] element_order={order} element_size={size}: {row['reduced_dofs']} DOFs, "
+                  f"{row['total_wall_s']:.2f} s")
+            rows.append(row)
+    return rows
+
+
+def print_order_study(rows):
+    print("Element order study (cantilever bending):")
+    print(f"{'order':>6} {'size':>8} {'DOFs':>9} {'time s':>8} {'tip err':>8} {'stress err':>10}")
+    for row in rows:
+        print(f"{row['element_order']:>6} {row['element_size']:>8g} {row['reduced_dofs']:>9} "
+              f"{row['total_wall_s']:>8.2f} {100 * row['deflection_error']:>7.2f}% {100 * row['stress_error']:>9.2f}%")
+
+
+def compare_baseline(levels, baseline, threshold):
+    """
+    Return a list of human-readable regressions of levels against a baseline report.
+    """
+    baseline_levels = {level["element_size"]: level for level in baseline["levels"]}
+    regressions = []
+    for level in levels:
+        reference = baseline_levels.get(level["element_size"])
+        if reference is None:
+            continue
+        for stage in STAGES:
+            now = level["stages"][stage]["wall_s"]
+            before = reference["stages"][stage]["wall_s"]
+            if max(now, before) >= MIN_COMPARED_SECONDS and now > threshold * before:
+                regressions.append(f"element_size={level['element_size']} {stage}: "
+                                   f"{now:.3f} s vs baseline {before:.3f} s ({now / before:.2f}x)")
+    return regressions
+
+
+def compute_speedup(serial_levels, parallel_levels):
+    """
+    Per-stage and total speedup of parallel over serial levels, matched by element size.
+    Returns {element_size: {stage: serial time / parallel time}}.
+    """
+    parallel_by_size = {level["element_size"]: level for level in parallel_levels}
+    speedup = {}
+    for serial in serial_levels:
+        parallel = parallel_by_size.get(serial["element_size"])
+        if parallel is None:
+            continue
+        stages = {stage: serial["stages"][stage]["wall_s"] / max(parallel["stages"][stage]["wall_s"], 1e-9)
+                  for stage in STAGES}
+        stages["total"] = serial["total_wall_s"] / max(parallel["total_wall_s"], 1e-9)
+        speedup[serial["element_size"]] = stages
+    return speedup
+
+
+def print_speedup(speedup, workers):
+    print(f"Speedup with {workers} workers (serial time / parallel time):")
+    print(f"{'size':>8} " + " ".join(f"{stage:>9}" for stage in (*STAGES, "total")))
+    for size, stages in speedup.items():
+        print(f"{size:>8g} " + " ".join(f"{stages[stage]:>8.2f}x" for stage in (*STAGES, "total")))
+
+
+def print_report(levels, exponents, accuracy):
+    header = f"{'size':>8} {'DOFs':>9} {'nnz':>11} {'K MiB':>8} " + " ".join(f"{stage:>9}" for stage in STAGES) \
+             + f" {'total':>8} {'RSS MiB':>8}"
+    print(header)
+    for level in levels:
+        nnz = "-" if level["nnz"] is None else level["nnz"]  # matrix-free
+        print(f"{level['element_size']:>8g} {level['reduced_dofs']:>9} {nnz:>11} {level['stiffness_mb']:>8.1f} "
+              + " ".join(f"{level['stages'][stage]['wall_s']:>9.3f}" for stage in STAGES)
+              + f" {level['total_wall_s']:>8.2f} {level['peak_rss_mb']:>8.0f}")
+
+    if exponents:
+        print("Scaling exponents (t ~ DOFs^k): "
+              + ", ".join(f"{stage} {k:.2f}" for stage, k in exponents.items()))
+
+    for name, check in (accuracy or {}).items():
+        mark = "✓" if check["passed"] else "!"
+        print(f"[{mark}] {name}: FEA {check['fea']:.4e}, exact {check['exact']:.4e}, "
+              f"error {100 * check['rel_error']:.1f}% (tolerance {100 * check['tolerance']:.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and validate the shaft FEA pipeline.")
+    parser.add_argument("--sizes", type=float, nargs="+", default=DEFAULT_SIZES, help="element size ladder")
+    parser.add_argument("--length", type=float, default=BASE_PARAMS["length"])
+    parser.add_argument("--radius", type=float, default=BASE_PARAMS["radius"])
+    parser.add_argument("--solver", default="auto", help="linear solver backend passed to solve_fea")
+    parser.add_argument("--workers", type=int, help="also run the ladder with this many element-loop workers "
+                                                    "and report the per-stage speedup")
+    parser.add_argument("--assembly", default="sparse", choices=("sparse", "dense", "matrix-free"),
+                        help="stiffness representation passed to solve_fea")
+    parser.add_argument("--element-order", type=int, default=1, choices=(1, 2),
+                        help="1 for linear tets, 2 for quadratic TET10 elements")
+    parser.add_argument("--order-study", action="store_true",
+                        help="compare linear and quadratic elements in bending over --order-sizes")
+    parser.add_argument("--order-sizes", type=float, nargs="+", default=DEFAULT_ORDER_SIZES,
+                        help="element sizes of the order study")
+    parser.add_argument("--mesh-cache", action="store_true", help="reuse cached meshes (excludes gmsh from timings)")
+    parser.add_argument("--trace-memory", action="store_true", help="also record peak allocations per stage")
+    parser.add_argument("--accuracy-size", type=float, default=0.02, help="element size for the accuracy checks")
+    parser.add_argument("--skip-accuracy", action="store_true")
+    parser.add_argument("--baseline", help="baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed slowdown factor per stage")
+    parser.add_argument("--save-baseline", help="write this run's report as a new baseline")
+    parser.add_argument("--output", help="write this run's report as JSON")
+    args = parser.parse_args()
+
+    params = {**BASE_PARAMS, "length": args.length, "radius": args.radius, "solver": args.solver,
+              "assembly": args.assembly, "mesh_cache": args.mesh_cache, "instrument_memory": args.trace_memory,
+              "element_order": args.element_order}
+
+    if args.order_study:
+        rows = run_order_study(params, args.order_sizes)
+        print_order_study(rows)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"params": params, "order_study": rows}, f, indent=2)
+        return 0
+
+    levels = run_ladder(params, args.sizes)
+    exponents = fit_scaling(levels)
+    accuracy = None if args.skip_accuracy else check_accuracy({**params, "element_size": args.accuracy_size,
+                                                                "mesh_cache": True})
+    print_report(levels, exponents, accuracy)
+
+    report = {"params": params, "levels": levels, "scaling": exponents, "accuracy": accuracy}
+    if args.workers:
+        parallel_levels = run_ladder({**params, "workers": args.workers}, args.sizes)
+        speedup = compute_speedup(levels, parallel_levels)
+        print_speedup(speedup, args.workers)
+        report["parallel"] = {"workers": args.workers, "levels": parallel_levels, "speedup": speedup}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    failed = False
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            parser.error(f"baseline {args.baseline} not found")
+        with open(args.baseline) as f:
+            regressions = compare_baseline(levels, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"[!] Regression: {regression}")
+        failed |= bool(regressions)
+    if accuracy is not None:
+        failed |= not all(check["passed"] for check in accuracy.values())
+
+    print("[!] Benchmark FAILED" if failed else "[✓] Benchmark passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,176 @@
+from collections import namedtuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from solver.fea_math import TET10_EDGES
+
+FaceRegion = namedtuple("FaceRegion", ["nodes", "triangles", "areas", "mass"])
+FaceRegion.__doc__ = """
+A planar boundary face of the mesh. nodes holds the sorted node indices on the
+face and triangles the face triangles in global node indices, (m, 3), or (m, 6)
+with midside nodes for TET10 meshes. areas is the tributary area of each node
+(the integral of its shape function over the face), in the order of nodes, and
+mass the consistent face matrix M_ab = integral of N_a N_b, so that M @ t are the
+nodal forces of a traction t sampled at nodes.
+"""
+
+# Nodes of the face opposite each corner of a tetrahedron
+TET_FACES = np.array([[1, 2, 3], [0, 2, 3], [0, 1, 3], [0, 1, 2]])
+
+# Corner nodes of the three edge nodes of a 6-node triangle
+TRI6_EDGES = np.array([[0, 1], [1, 2], [0, 2]])
+
+# 6-point Gauss rule on the triangle in barycentric coordinates, exact to degree 4
+# (the products of two quadratic shape functions); weights sum to 1
+_TRI_A1, _TRI_W1 = 0.445948490915965, 0.223381589678011
+_TRI_A2, _TRI_W2 = 0.091576213509771, 0.109951743655322
+_TRI_GAUSS_POINTS = np.array([
+    [_TRI_A1, _TRI_A1, 1 - 2 * _TRI_A1], [_TRI_A1, 1 - 2 * _TRI_A1, _TRI_A1], [1 - 2 * _TRI_A1, _TRI_A1, _TRI_A1],
+    [_TRI_A2, _TRI_A2, 1 - 2 * _TRI_A2], [_TRI_A2, 1 - 2 * _TRI_A2, _TRI_A2], [1 - 2 * _TRI_A2, _TRI_A2, _TRI_A2],
+])
+_TRI_GAUSS_WEIGHTS = np.array([_TRI_W1] * 3 + [_TRI_W2] * 3)
+
+
+def build_face_regions(points, cells, face_nodes):
+    """
+    FaceRegion of every named face in face_nodes (e.g. "top" and "bottom"),
+    built once per mesh. Returns a dict name -> FaceRegion.
+    """
+    return {name: face_region(points, cells, nodes) for name, nodes in face_nodes.items()}
+
+
+def face_region(points, cells, nodes):
+    """
+    FaceRegion of the planar face through nodes.
+    """
+    nodes = np.unique(nodes)
+    triangles = face_triangles(cells, nodes, len(points))
+    mass = face_mass_matrix(points, triangles, nodes)
+    return FaceRegion(nodes, triangles, np.asarray(mass.sum(axis=1)).ravel(), mass)
+
+
+def face_triangles(cells, nodes, num_nodes):
+    """
+    Triangles of the tetrahedra whose three corners all lie in nodes. For a
+    planar face, these are exactly the boundary triangles on it. Midside nodes of
+    TET10 cells are appended in TRI6_EDGES order.
+    """
+    on_face = np.zeros(num_nodes, dtype=bool)
+    on_face[nodes] = True
+    corners = cells[:, :4]
+    touching = np.flatnonzero(on_face[corners].sum(axis=1) >= 3)  # Only these tets can have a face there
+
+    faces = corners[touching][:, TET_FACES]  # shape (len(touching), 4, 3)
+    element, face = np.nonzero(on_face[faces].all(axis=2))
+    triangles = faces[element, face]
+    if cells.shape[1] == 10:
+        # Local edge node of each corner pair, e.g. edge_node[0, 1] == 4
+        edge_node = np.zeros((4, 4), dtype=int)
+        edge_node[TET10_EDGES[:, 0], TET10_EDGES[:, 1]] = np.arange(4, 10)
+        edge_node[TET10_EDGES[:, 1], TET10_EDGES[:, 0]] = np.arange(4, 10)
+        local = TET_FACES[face]
+        midside = edge_node[local[:, TRI6_EDGES[:, 0]], local[:, TRI6_EDGES[:, 1]]]
+        triangles = np.hstack([triangles, cells[touching[element][:, None], midside]])
+    return triangles
+
+
+def face_mass_matrix(points, triangles, nodes):
+    """
+    Consistent face matrix M_ab = integral of N_a N_b over the triangles, for
+    the face nodes (rows and columns in the order of nodes), as CSR.
+    """
+    areas = triangle_areas(points, triangles)
+    N = triangle_shape_functions(_TRI_GAUSS_POINTS, triangles.shape[1])  # shape (num_points, nodes)
+    me = np.einsum("g,ga,gb->ab", _TRI_GAUSS_WEIGHTS, N, N)  # Per unit area, the same for every straight triangle
+    local = np.searchsorted(nodes, triangles)
+    rows = np.repeat(local, triangles.shape[1], axis=1).ravel()
+    cols = np.tile(local, (1, triangles.shape[1])).ravel()
+    data = (areas[:, None, None] * me).ravel()
+    return sp.coo_matrix((data, (rows, cols)), shape=(len(nodes), len(nodes))).tocsr()
+
+
+def triangle_areas(points, triangles):
+    """
+    Areas of straight-sided triangles, from their corner nodes.
+    """
+    corners = points[triangles[:, :3]]
+    return 0.5 * np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1)
+
+
+def triangle_load_weights(points, triangles):
+    """
+    Integral of each shape function over each triangle, shape (m, nodes): the
+    consistent nodal forces of a unit uniform traction on that triangle.
+    """
+    N = triangle_shape_functions(_TRI_GAUSS_POINTS, triangles.shape[1])
+    return triangle_areas(points, triangles)[:, None] * (_TRI_GAUSS_WEIGHTS @ N)
+
+
+def triangle_shape_functions(L, nodes_per_triangle=3):
+    """
+    Shape functions of 3-node (linear) or 6-node (quadratic) triangles at
+    barycentric coordinates L, shape (num_points, 3). Returns (num_points, nodes).
+    """
+    if nodes_per_triangle == 3:
+        return L
+    a, b = TRI6_EDGES.T
+    return np.hstack([L * (2 * L - 1), 4 * L[:, a] * L[:, b]])
+
+
+def fixed_face_dofs(node_indices):
+    """
+    All three DOFs of each node in node_indices, e.g. the clamped bottom face.
+    """
+    return (np.asarray(node_indices)[:, None] * 3 + np.arange(3)).ravel()
+
+
+def build_load_vector(points, region, load_type, load_value, bending_pos, bending_patch_radius=None, log=print):
+    """
+    Build the global load vector for a load_type such as "axial+bending" as
+    consistent nodal forces of distributed tractions on the face region:
+
+    - axial: a uniform normal traction P / A.
+    - torsion: a shear traction T r / J around the z-axis, with J the polar
+      moment of the meshed face, so the resultant torque is exactly T.
+    - bending: a uniform y-traction over the face triangles whose centroids lie
+      within bending_patch_radius of bending_pos (default: a quarter of the face
+      radius), or over the nearest triangle if the patch holds none.
+    """
+    F = np.zeros((len(points), 3))
+    nodes, mass = region.nodes, region.mass
+    x, y = points[nodes, 0], points[nodes, 1]
+
+    for part in load_type.split("+"):
+        part = part.strip().lower()
+        if part not in ("axial", "bending", "torsion"):
+            raise ValueError(f"Invalid load component '{part}' in load_type '{load_type}'")
+        value = load_value.get(part, 0)
+        if value == 0:
+            continue
+
+        if part == "axial":
+            F[nodes, 2] += value * region.areas / region.areas.sum()
+        elif part == "torsion":
+            # Both traction components are linear in x and y, which the shape functions interpolate exactly
+            Mx, My = mass @ x, mass @ y
+            J = x @ Mx + y @ My  # Integral of r^2 over the face
+            F[nodes, 0] -= value * My / J
+            F[nodes, 1] += value * Mx / J
+        else:
+            if bending_patch_radius is None:
+                bending_patch_radius = 0.25 * np.sqrt(region.areas.sum() / np.pi)
+            centroids = points[region.triangles[:, :3], :2].mean(axis=1)
+            distances = np.hypot(centroids[:, 0] - bending_pos["x"], centroids[:, 1] - bending_pos["y"])
+            patch = np.flatnonzero(distances <= bending_patch_radius)
+            if len(patch) == 0:
+                patch = [np.argmin(distances)]
+                log(f"[!] No face triangles within {bending_patch_radius:.4g} m of the bending position, "
+                    f"loading the nearest one")
+            triangles = region.triangles[patch]
+            weights = triangle_load_weights(points, triangles)
+            np.add.at(F[:, 1], triangles, value * weights / weights.sum())
+            log(f"[✓] Applied bending load of {value} N over {len(triangles)} face triangles around "
+                f"(x={bending_pos['x']:.3f}, y={bending_pos['y']:.3f})")
+
+    return F.ravel()
@@ -1,8 +1,13 @@
+from collections import namedtuple
+
 import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
 
 def assemble_global_stiffness(points, cells, D):
     """
-    Assemble global stiffness matrix for tetrahedral mesh.
+    Assemble global stiffness matrix for a linear or TET10 tetrahedral mesh.
+    Dense reference implementation, only suitable for small meshes.
     """
     num_nodes = len(points)
     K = np.zeros((num_nodes * 3, num_nodes * 3))
@@ -19,10 +24,270 @@ def assemble_global_stiffness(points, cells, D):
     return K
 
 
+def assemble_global_stiffness_sparse(points, cells, D, geometry=None, chunk_size=50000):
+    """
+    Assemble global stiffness matrix for a linear or TET10 tetrahedral mesh as a CSR matrix.
+    Element matrices are computed in batches and scattered as COO triplets.
+    Pass an ElementGeometry from compute_element_geometry to reuse it.
+    """
+    if geometry is None:
+        geometry = compute_element_geometry(points, cells)
+
+    num_dofs = len(points) * 3
+    num_elements = len(cells)
+    index_dtype = np.int32 if num_dofs < np.iinfo(np.int32).max else np.int64
+
+    dofs = element_dofs(cells).astype(index_dtype)
+    element_size = dofs.shape[1]
+
+    rows = np.empty((num_elements, element_size, element_size), dtype=index_dtype)
+    cols = np.empty((num_elements, element_size, element_size), dtype=index_dtype)
+    data = np.empty((num_elements, element_size, element_size))
+    rows[:] = dofs[:, :, None]
+    cols[:] = dofs[:, None, :]
+
+    # Chunk the batched element computation to bound temporary memory
+    weights = element_weights(geometry)
+    for start in range(0, num_elements, chunk_size):
+        stop = min(start + chunk_size, num_elements)
+        B = geometry.B[start:stop] if geometry.B is not None else strain_displacement_matrices(geometry.grad_N[start:stop])
+        data[start:stop] = compute_element_stiffness_batch(B, weights[start:stop], D)
+
+    K = sp.coo_matrix((data.ravel(), (rows.ravel(), cols.ravel())), shape=(num_dofs, num_dofs))
+    return K.tocsr()
+
+
+ElementGeometry = namedtuple("ElementGeometry", ["volumes", "grad_N", "B", "weights"], defaults=(None,))
+ElementGeometry.__doc__ = """
+Per-element geometry of a tetrahedral mesh, computed once and shared by assembly
+and stress recovery. volumes has shape (num_elements,) and is zero for degenerate
+elements. For linear tets grad_N has shape (num_elements, 4, 3), B (num_elements, 6, 12)
+and weights is None. For quadratic TET10 elements both are evaluated at the Gauss
+points: grad_N (num_elements, 4, 10, 3), B (num_elements, 4, 6, 30), and weights
+(num_elements, 4) holds the quadrature weights times the Jacobian determinant.
+B is None when it was not precomputed.
+"""
+
+# 4-point Gauss rule on the reference tetrahedron, exact for the quadratic
+# integrand of a straight-sided TET10 stiffness matrix
+_GAUSS_A, _GAUSS_B = 0.5854101966249685, 0.1381966011250105
+TET10_GAUSS_POINTS = np.array([
+    [_GAUSS_B, _GAUSS_B, _GAUSS_B],
+    [_GAUSS_A, _GAUSS_B, _GAUSS_B],
+    [_GAUSS_B, _GAUSS_A, _GAUSS_B],
+    [_GAUSS_B, _GAUSS_B, _GAUSS_A],
+])
+TET10_GAUSS_WEIGHTS = np.full(4, 1.0 / 24.0)
+
+# Corner nodes of the six edge nodes of a TET10, in VTK (and meshio) node order
+TET10_EDGES = np.array([[0, 1], [1, 2], [0, 2], [0, 3], [1, 3], [2, 3]])
+
+# Barycentric gradients of the corner shape functions on the reference tetrahedron
+_BARYCENTRIC_GRADIENTS = np.array([[-1.0, -1.0, -1.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+
+
+def _barycentric(xi):
+    return np.column_stack([1.0 - xi.sum(axis=1), xi])
+
+
+# Stress is linear in a straight-sided TET10, so its values at the four Gauss
+# points determine it exactly; this maps them to the corners
+_GAUSS_TO_CORNERS = np.linalg.inv(_barycentric(TET10_GAUSS_POINTS))
+
+
+def compute_element_geometry(points, cells, with_B=True):
+    """
+    Compute volumes, shape function gradients and strain-displacement matrices for all tetrahedra.
+    cells with 10 nodes per element are treated as quadratic TET10 elements.
+    with_B=False skips the B matrices, which take six times the memory of grad_N.
+    """
+    if cells.shape[1] == 10:
+        return _compute_tet10_geometry(points, cells, with_B)
+
+    num_elements = len(cells)
+
+    A = np.ones((num_elements, 4, 4))
+    A[:, :, 1:] = points[cells]
+    detA = np.linalg.det(A)
+    volumes = np.abs(detA) / 6.0
+    valid = volumes >= 1e-12  # Skip degenerate elements
+    volumes[~valid] = 0.0
+
+    invA = np.zeros_like(A)
+    invA[valid] = np.linalg.inv(A[valid])
+
+    # grad_N[e, i] is the gradient of shape function i, i.e. column i of invA without the first row
+    grad_N = np.ascontiguousarray(invA[:, 1:, :].transpose(0, 2, 1))  # shape (num_elements, 4, 3)
+
+    B = strain_displacement_matrices(grad_N) if with_B else None
+    return ElementGeometry(volumes, grad_N, B)
+
+
+def _compute_tet10_geometry(points, cells, with_B=True):
+    """
+    Quadratic tetrahedra: Jacobians, shape function gradients and B matrices at the 4 Gauss points.
+    """
+    dN = tet10_shape_gradients(TET10_GAUSS_POINTS)  # shape (4, 10, 3) in natural coordinates
+    J = np.einsum("eai,gaj->egij", points[cells], dN)  # dx_i/dxi_j, shape (num_elements, 4, 3, 3)
+    detJ = np.linalg.det(J)
+
+    weights = np.abs(detJ) * TET10_GAUSS_WEIGHTS
+    valid = np.all(np.abs(detJ) >= 6e-12, axis=1)  # Skip degenerate elements, as for linear tets
+    weights[~valid] = 0.0
+
+    invJ = np.zeros_like(J)
+    invJ[valid] = np.linalg.inv(J[valid])
+    grad_N = np.einsum("gaj,egjk->egak", dN, invJ)  # shape (num_elements, 4, 10, 3)
+
+    B = strain_displacement_matrices(grad_N) if with_B else None
+    return ElementGeometry(weights.sum(axis=1), grad_N, B, weights)
+
+
+def tet10_shape_gradients(xi):
+    """
+    Gradients of the 10 quadratic shape functions (VTK node order) with respect to
+    the natural coordinates, at points xi of shape (num_points, 3).
+    Returns an array of shape (num_points, 10, 3).
+    """
+    L = _barycentric(xi)
+    dN = np.empty((len(xi), 10, 3))
+    dN[:, :4] = (4 * L - 1)[:, :, None] * _BARYCENTRIC_GRADIENTS  # Corners: L_i (2 L_i - 1)
+    a, b = TET10_EDGES.T
+    dN[:, 4:] = 4 * (L[:, a, None] * _BARYCENTRIC_GRADIENTS[b] + L[:, b, None] * _BARYCENTRIC_GRADIENTS[a])  # 4 L_a L_b
+    return dN
+
+
+def tet10_shape_functions(xi):
+    """
+    The 10 quadratic shape functions (VTK node order) at natural coordinates xi of shape (num_points, 3).
+    Returns an array of shape (num_points, 10).
+    """
+    L = _barycentric(xi)
+    a, b = TET10_EDGES.T
+    return np.hstack([L * (2 * L - 1), 4 * L[:, a] * L[:, b]])
+
+
+def reference_mass_matrix(nodes_per_element):
+    """
+    Integral of N_a N_b over a straight-sided tet of unit volume, for linear (4) or TET10 (10) elements.
+    """
+    # Collapsed (Duffy) product of 4-point Gauss-Legendre rules on the unit cube, exact
+    # for the degree 4 integrands of TET10 even after the degree 3 Jacobian of the map
+    g, w = np.polynomial.legendre.leggauss(4)
+    g, w = (g + 1) / 2, w / 2
+    u, v, s = (axis.ravel() for axis in np.meshgrid(g, g, g, indexing="ij"))
+    weights = np.prod([axis.ravel() for axis in np.meshgrid(w, w, w, indexing="ij")], axis=0) * (1 - u)**2 * (1 - v)
+    xi = np.column_stack([u, v * (1 - u), s * (1 - u) * (1 - v)])
+
+    N = _barycentric(xi) if nodes_per_element == 4 else tet10_shape_functions(xi)
+    return 6 * np.einsum("g,ga,gb->ab", weights, N, N)  # The reference tet has volume 1/6
+
+
+def assemble_global_mass(points, cells, density=1.0, geometry=None, lumped=False):
+    """
+    Consistent mass matrix of a linear or TET10 mesh as CSR, with the sparsity of K.
+    With lumped=True returns a diagonal mass matrix instead. Each element's mass
+    is spread over its nodes in proportion to the diagonal of its consistent mass
+    (HRZ lumping), which, unlike row sums, keeps every nodal mass of a TET10 positive.
+    """
+    if geometry is None:
+        geometry = compute_element_geometry(points, cells, with_B=False)
+    num_nodes = len(points)
+    nodes_per_element = cells.shape[1]
+    reference = reference_mass_matrix(nodes_per_element)
+    element_mass = density * geometry.volumes
+
+    if lumped:
+        share = np.diag(reference) / np.trace(reference)
+        nodal_mass = np.bincount(cells.ravel(), weights=(element_mass[:, None] * share).ravel(), minlength=num_nodes)
+        return sp.diags(np.repeat(nodal_mass, 3)).tocsr()
+
+    # Assemble the scalar (per node) matrix, then expand to the x, y, z DOFs of each node
+    rows = np.repeat(cells, nodes_per_element, axis=1).ravel()
+    cols = np.tile(cells, (1, nodes_per_element)).ravel()
+    data = (element_mass[:, None, None] * reference).ravel()
+    M_nodes = sp.coo_matrix((data, (rows, cols)), shape=(num_nodes, num_nodes)).tocsr()
+    return sp.kron(M_nodes, sp.identity(3), format="csr")
+
+
+def element_weights(geometry):
+    """
+    Integration weights matching geometry.B: the volumes for linear tets, the Gauss point weights for TET10.
+    """
+    return geometry.volumes if geometry.weights is None else geometry.weights
+
+
+def strain_displacement_matrices(grad_N):
+    """
+    B matrices, shape (..., 6, 3 * nodes), from shape function gradients of shape (..., nodes, 3).
+    """
+    B = np.zeros(grad_N.shape[:-2] + (6, 3 * grad_N.shape[-2]))
+    B[..., 0, 0::3] = grad_N[..., 0]
+    B[..., 1, 1::3] = grad_N[..., 1]
+    B[..., 2, 2::3] = grad_N[..., 2]
+    B[..., 3, 0::3] = grad_N[..., 1]
+    B[..., 3, 1::3] = grad_N[..., 0]
+    B[..., 4, 1::3] = grad_N[..., 2]
+    B[..., 4, 2::3] = grad_N[..., 1]
+    B[..., 5, 0::3] = grad_N[..., 2]
+    B[..., 5, 2::3] = grad_N[..., 0]
+    return B
+
+
+def strain_from_gradients(grad_N, u_e):
+    """
+    Voigt strains (xx, yy, zz, xy, yz, zx) from shape function gradients and element
+    displacements (num_elements, 3 * nodes), without B. grad_N has shape
+    (num_elements, nodes, 3), or (num_elements, num_points, nodes, 3) for strains at
+    several points of each element; the result has shape grad_N.shape[:-2] + (6,).
+    """
+    u = u_e.reshape(len(u_e), grad_N.shape[-2], 3)
+    if grad_N.ndim == 4:
+        u = u[:, None]  # Same displacements at every point
+    grad_u = np.matmul(np.swapaxes(u, -1, -2), grad_N).reshape(grad_N.shape[:-2] + (9,))  # du_i/dx_j at 3i + j
+    strain = grad_u[..., [0, 4, 8, 1, 5, 6]]
+    strain[..., 3:] += grad_u[..., [3, 7, 2]]
+    return strain
+
+
+def extrapolate_to_nodes(values):
+    """
+    Values at the 4 Gauss points of TET10 elements, shape (num_elements, 4, k), extrapolated
+    linearly to the 10 element nodes. Exact for the linear stress field of a straight-sided TET10.
+    """
+    corners = np.einsum("cg,egk->eck", _GAUSS_TO_CORNERS, values)
+    a, b = TET10_EDGES.T
+    return np.concatenate([corners, 0.5 * (corners[:, a] + corners[:, b])], axis=1)
+
+
+def element_dofs(cells):
+    """
+    Global DOF numbers of each element, shape (num_elements, 3 * nodes_per_element).
+    """
+    return (cells[:, :, None] * 3 + np.arange(3)).reshape(len(cells), -1)
+
+
+def compute_element_stiffness_batch(B, volumes, D):
+    """
+    Compute element stiffness matrices for a batch of tetrahedral elements.
+    For TET10, B has shape (num_elements, 4, 6, 30) and volumes holds the Gauss point weights.
+    Returns an array of shape (num_elements, 3 * nodes, 3 * nodes); degenerate elements get zeros.
+    """
+    if B.ndim == 4:
+        return np.einsum("egji,jk,egkl,eg->eil", B, D, B, volumes, optimize=True)
+    ke = np.einsum("eji,jk,ekl->eil", B, D, B, optimize=True)
+    ke *= volumes[:, None, None]
+    return ke
+
+
 def compute_element_stiffness(coords, D):
     """
     Compute element stiffness matrix for a tetrahedral element.
     """
+    if len(coords) == 10:
+        geometry = compute_element_geometry(coords, np.arange(10)[None, :])
+        return compute_element_stiffness_batch(geometry.B, geometry.weights, D)[0]
+
     # Construct the 4x4 matrix for shape function derivatives
     A = np.ones((4, 4))
     A[:, 1:] = coords
@@ -54,68 +319,207 @@ def compute_element_stiffness(coords, D):
     return ke
 
 
-def apply_boundary_conditions(K, F, fixed_dofs):
+# Voigt (xx, yy, zz, xy, yz, zx) component of each entry of the symmetric 3x3 tensor
+_VOIGT_TENSOR = np.array([[0, 3, 5], [3, 1, 4], [5, 4, 2]])
+
+
+class ElementStiffnessOperator(spla.LinearOperator):
+    """
+    Global stiffness matrix applied element by element, K u = sum_e V_e B_e^T D B_e u_e
+    (summed over the Gauss points for TET10), without ever assembling K. Strains
+    and nodal forces are formed directly from the shape function gradients, so
+    only cells, integration weights and grad_N are kept and memory grows
+    linearly with the number of elements. With free_dofs the operator acts on
+    the reduced system, with fixed DOFs held at zero.
+    """
+
+    def __init__(self, cells, D, geometry, num_dofs, free_dofs=None, chunk_size=50000):
+        self.cells = cells
+        self.D = D
+        self.geometry = geometry._replace(B=None)
+        # Linear tets are treated as a one-point rule, so both element types share the loops below
+        if geometry.weights is None:
+            self.grad_N, self.weights = geometry.grad_N[:, None], geometry.volumes[:, None]
+        else:
+            self.grad_N, self.weights = geometry.grad_N, geometry.weights
+        self.num_dofs = num_dofs
+        self.free_dofs = free_dofs
+        self.chunk_size = chunk_size
+        n = num_dofs if free_dofs is None else len(free_dofs)
+        super().__init__(dtype=np.float64, shape=(n, n))
+
+    def restrict(self, free_dofs):
+        """
+        The same operator restricted to free_dofs.
+        """
+        return ElementStiffnessOperator(self.cells, self.D, self.geometry, self.num_dofs, free_dofs, self.chunk_size)
+
+    def diagonal(self):
+        """
+        Diagonal of K, summed from the element matrix diagonals (for Jacobi preconditioning).
+        """
+        diag = np.zeros(self.num_dofs)
+        for dofs, grad_N, weights in self._chunks():
+            B = strain_displacement_matrices(grad_N)
+            ke_diag = np.einsum("egai,ab,egbi,eg->ei", B, self.D, B, weights, optimize=True)
+            diag += np.bincount(dofs.ravel(), weights=ke_diag.ravel(), minlength=self.num_dofs)
+        return diag if self.free_dofs is None else diag[self.free_dofs]
+
+    @property
+    def nbytes(self):
+        """
+        Memory held by the operator, in bytes.
+        """
+        return self.cells.nbytes + self.weights.nbytes + self.grad_N.nbytes
+
+    def _matvec(self, x):
+        if self.free_dofs is None:
+            u = x.ravel()
+        else:
+            u = np.zeros(self.num_dofs)
+            u[self.free_dofs] = x.ravel()
+
+        f = np.zeros(self.num_dofs)
+        for dofs, grad_N, weights in self._chunks():
+            stress = (strain_from_gradients(grad_N, u[dofs]) @ self.D.T) * weights[..., None]
+            f_e = np.matmul(grad_N, stress[..., _VOIGT_TENSOR]).sum(axis=1)  # f_ai = sum_g w_g dN_a/dx_j sigma_ji
+            f += np.bincount(dofs.ravel(), weights=f_e.ravel(), minlength=self.num_dofs)
+        return f if self.free_dofs is None else f[self.free_dofs]
+
+    def _rmatvec(self, x):
+        return self._matvec(x)  # K is symmetric
+
+    def _chunks(self):
+        # Chunk the batched element operations to bound temporary memory
+        for start in range(0, len(self.cells), self.chunk_size):
+            stop = start + self.chunk_size
+            yield element_dofs(self.cells[start:stop]), self.grad_N[start:stop], self.weights[start:stop]
+
+
+def apply_boundary_conditions(K, F, fixed_dofs, method="reduce"):
     """
     Apply boundary conditions by reducing the global system.
+    Accepts a dense array, a scipy sparse matrix or an ElementStiffnessOperator for K.
     Returns reduced K, reduced F, and free DOFs.
+
+    method="eliminate" instead zeroes the rows and columns of the fixed DOFs of a
+    sparse or dense K in place, keeping their diagonal, so no copy of K is made.
+    The system then keeps all DOFs (free DOFs are all of them) and solves to zero
+    displacement at the fixed ones. An ElementStiffnessOperator is always
+    restricted, which does not copy it either.
     """
+    if method not in ("reduce", "eliminate"):
+        raise ValueError(f"Invalid constraint method '{method}', expected 'reduce' or 'eliminate'")
     total_dofs = K.shape[0]
     all_dofs = np.arange(total_dofs)
-    free_dofs = np.setdiff1d(all_dofs, fixed_dofs)
 
-    K_reduced = K[np.ix_(free_dofs, free_dofs)]
+    if method == "eliminate" and not isinstance(K, ElementStiffnessOperator):
+        fixed_dofs = np.unique(fixed_dofs)
+        diagonal = K.diagonal()[fixed_dofs]
+        if sp.issparse(K):
+            K = K.tocsr()  # A no-op for the CSR matrices of the assembly
+            fixed = np.zeros(total_dofs, dtype=bool)
+            fixed[fixed_dofs] = True
+            K.data[np.repeat(fixed, np.diff(K.indptr)) | fixed[K.indices]] = 0.0
+        else:
+            K[fixed_dofs, :] = 0.0
+            K[:, fixed_dofs] = 0.0
+        K[fixed_dofs, fixed_dofs] = diagonal
+        F = F.copy()
+        F[fixed_dofs] = 0.0
+        return K, F, all_dofs
+
+    free_dofs = np.setdiff1d(all_dofs, fixed_dofs)
+    if sp.issparse(K):
+        K = K.tocsr()
+        K_reduced = K[free_dofs][:, free_dofs]
+    elif isinstance(K, ElementStiffnessOperator):
+        K_reduced = K.restrict(free_dofs)
+    else:
+        K_reduced = K[np.ix_(free_dofs, free_dofs)]
     F_reduced = F[free_dofs]
 
     return K_reduced, F_reduced, free_dofs
 
 
-def compute_von_mises_stress(points, cells, U, D):
+def compute_element_stress(cells, U, D, geometry):
     """
-    Compute von Mises stress averaged at each node.
+    Compute strain and stress (Voigt order xx, yy, zz, xy, yz, zx) in every element.
+    Returns strain and stress arrays of shape (num_elements, 6) for the constant
+    strain of linear tets, or (num_elements, 10, 6) at the nodes of TET10 elements.
     """
-    stress = np.zeros(len(points))
-    counts = np.zeros(len(points))
+    u_e = U[element_dofs(cells)]  # shape (num_elements, 3 * nodes)
+    if geometry.B is None:
+        strain = strain_from_gradients(geometry.grad_N, u_e)
+    elif geometry.B.ndim == 4:
+        strain = np.einsum("egij,ej->egi", geometry.B, u_e)
+    else:
+        strain = np.einsum("eij,ej->ei", geometry.B, u_e)
+    if geometry.weights is not None:
+        strain = extrapolate_to_nodes(strain)
+    stress = strain @ D.T
+    return strain, stress
+
+
+def von_mises(sigma):
+    """
+    von Mises equivalent stress of Voigt stress vectors with shape (..., 6).
+    """
+    return np.sqrt(
+        0.5 * ((sigma[..., 0] - sigma[..., 1])**2 + (sigma[..., 1] - sigma[..., 2])**2 + (sigma[..., 2] - sigma[..., 0])**2)
+        + 3 * (sigma[..., 3]**2 + sigma[..., 4]**2 + sigma[..., 5]**2)
+    )
 
-    for tet in cells:
-        node_ids = tet
-        coords = points[node_ids]
-        u_e = np.hstack([U[i*3:i*3+3] for i in node_ids])
 
-        A = np.ones((4, 4))
-        A[:, 1:] = coords
-        detA = np.linalg.det(A)
-        volume = abs(detA) / 6.0
+def average_at_nodes(cells, values, valid, num_nodes, per_node=False):
+    """
+    Average per-element values at the nodes, skipping elements where valid is False.
+    values may be (num_elements,) or (num_elements, k), or with per_node=True given
+    at every element node, (num_elements, nodes_per_element) or (num_elements, nodes_per_element, k).
+    """
+    nodes = cells[valid].ravel()
+    counts = np.bincount(nodes, minlength=num_nodes)
+    values = values[valid]
+    nodes_per_element = cells.shape[1]
+    if per_node:
+        values = values.reshape((len(nodes),) + values.shape[2:])
+    else:
+        values = np.repeat(values, nodes_per_element, axis=0)
 
-        if volume < 1e-12:
-            continue
+    if values.ndim == 1:
+        sums = np.bincount(nodes, weights=values, minlength=num_nodes)
+    else:
+        sums = np.stack([
+            np.bincount(nodes, weights=values[:, k], minlength=num_nodes)
+            for k in range(values.shape[1])
+        ], axis=1)
 
-        invA = np.linalg.inv(A)
+    has_elements = counts > 0
+    sums[has_elements] /= counts[has_elements].reshape((-1,) + (1,) * (sums.ndim - 1))
+    return sums
 
-        B = np.zeros((6, 12))
-        for i in range(4):
-            grad_N = invA[1:, i]
 
-            B[:, i*3:i*3+3] = np.array([
-                [grad_N[0], 0, 0],
-                [0, grad_N[1], 0],
-                [0, 0, grad_N[2]],
-                [grad_N[1], grad_N[0], 0],
-                [0, grad_N[2], grad_N[1]],
-                [grad_N[2], 0, grad_N[0]],
-            ])
+def compute_von_mises_stress(points, cells, U, D, geometry=None, return_tensor=False):
+    """
+    Compute von Mises stress averaged at each node.
+    With return_tensor=True also returns the nodal-averaged stress tensor, shape (N, 6).
+    """
+    if geometry is None:
+        geometry = compute_element_geometry(points, cells)
 
-        strain = B @ u_e
-        sigma = D @ strain
+    _, sigma = compute_element_stress(cells, U, D, geometry)
+    return nodal_stress(cells, sigma, geometry.volumes > 0, len(points), return_tensor)
 
-        von_mises = np.sqrt(
-            0.5 * ((sigma[0] - sigma[1])**2 + (sigma[1] - sigma[2])**2 + (sigma[2] - sigma[0])**2)
-            + 3 * (sigma[3]**2 + sigma[4]**2 + sigma[5]**2)
-        )
 
-        for idx in node_ids:
-            stress[idx] += von_mises
-            counts[idx] += 1
+def nodal_stress(cells, sigma, valid, num_nodes, return_tensor=False):
+    """
+    Nodal-averaged von Mises stress from element stresses as returned by compute_element_stress.
+    With return_tensor=True also returns the nodal-averaged stress tensor, shape (N, 6).
+    """
+    per_node = sigma.ndim == 3  # TET10 stresses are given at the element nodes
 
     # Average von Mises stress per node
-    stress[counts > 0] /= counts[counts > 0]
+    stress = average_at_nodes(cells, von_mises(sigma), valid, num_nodes, per_node)
+    if return_tensor:
+        return stress, average_at_nodes(cells, sigma, valid, num_nodes, per_node)
     return stress
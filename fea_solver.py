@@ -1,107 +1,597 @@
-import meshio
+import json
+
 import numpy as np
-import os
-
-from solver.material import get_elasticity_matrix
-from solver.fea_math import assemble_global_stiffness, apply_boundary_conditions, compute_von_mises_stress
-from mesh.generate_mesh import generate_shaft_mesh # Ensure this import is correct
-
-def solve_fea(params):
-    length = params["length"]
-    radius = params["radius"]
-    E = params["E"]
-    nu = params["nu"]
-    element_size = params["element_size"] # New: Get element size
-    load_type = params["load_type"]
-    load_value = params["load_value"]  # Dict with keys: 'axial', 'bending', 'torsion'
-    bending_pos = params.get("bending_pos", {"x": 0.0, "y": 0.0})
+import scipy.sparse as sp
 
-    # Pass element_size to the mesh generation function
-    mesh_file = generate_shaft_mesh(length=length, radius=radius, element_size=element_size)
+from solver.material import DEFAULT_DENSITY, get_elasticity_matrix
+from solver.fea_math import (ElementStiffnessOperator, assemble_global_mass, assemble_global_stiffness,
+                             assemble_global_stiffness_sparse, apply_boundary_conditions, compute_element_geometry,
+                             compute_element_stress, compute_von_mises_stress, nodal_stress)
+from solver.linear_solver import Factorization
+from solver.boundary import build_face_regions, build_load_vector, fixed_face_dofs
+from solver.modal import classify_modes, critical_speeds, modal_analysis, normalized_mode_shapes
+from solver.parallel import ElementPool
+from solver.result_io import ResultMesh, write_results
+from solver.result_store import RUN_ENTRIES, open_result_store
+from solver.instrumentation import NullRecorder, finish_stats, make_recorder
+from mesh.mesh_cache import MeshCache, get_shaft_mesh
 
-    print("[✓] Reading mesh...")
-    mesh = meshio.read(mesh_file)
-    points = mesh.points
-    cells = mesh.cells_dict["tetra"]
-    num_nodes = len(points)
+ANALYSES = ("static", "modal")
 
-    print(f"[✓] Mesh: {num_nodes} nodes, {len(cells)} tetra elements")
 
-    D = get_elasticity_matrix(E, nu)
+class ProgressReporter:
+    """
+    Prints log lines and forwards them, and stage changes, to an optional
+    callback(kind, value) where kind is "stage" (value from instrumentation.STAGES) or "log".
+    Stage changes also start and stop the timers of the stage recorder.
+    """
 
-    print("[✓] Assembling global stiffness matrix...")
-    K = assemble_global_stiffness(points, cells, D)
-    total_dofs = num_nodes * 3
+    def __init__(self, callback=None, recorder=None):
+        self.callback = callback
+        self.recorder = recorder if recorder is not None else NullRecorder()
+
+    def stage(self, name):
+        self.recorder.start(name)
+        if self.callback is not None:
+            self.callback("stage", name)
+
+    def finish(self):
+        self.recorder.finish()
+
+    def log(self, message):
+        print(message)
+        if self.callback is not None:
+            self.callback("log", message)
+
+
+def solve_fea(params, progress=None):
+    """
+    Run the full mesh, assemble, solve and stress pipeline for params and write
+    the deformed shaft to params["output_dir"] (default "output").
+    progress is an optional callback(kind, value), see ProgressReporter.
+    Returns a dict of summary metrics, the path of the written file and the
+    result itself as a ResultMesh under "result_mesh". With
+    params["instrument"] set it also holds per-stage timings and memory under
+    "stats", which are exported as JSON to params["stats_file"] if given.
+    Use ShaftModel directly to keep intermediate results between solves.
+    With params["adaptive"] set the mesh is refined adaptively, see solver.adaptive.
+    Load cases without bending are solved on a 2D axisymmetric model unless
+    params["axisymmetric"] is False, see use_axisymmetric.
+    params["analysis"] = "modal" computes natural frequencies and critical speeds
+    instead of the static response, see ShaftModel.solve_modal.
+    A configuration solved before is reopened from the result store, see solve_stored.
+    """
+    return solve_stored(params, lambda: solve_analysis(params, progress), progress)
+
+
+def solve_stored(params, solve, progress=None):
+    """
+    Return the stored result of an earlier solve of the same params, or run
+    solve() and store its result. The store (see solver.result_store) is kept in
+    params["result_store_dir"] and disabled with params["result_store"] = False.
+    A stored result is written to params["output_dir"] in params["output_format"]
+    like a fresh one, and has "recomputed" empty and the stats of the run that
+    computed it. If those stats are missing but params["instrument"] asks for
+    them, the configuration is solved again. Results of an enabled store carry
+    their "store_key".
+    """
+    store = open_result_store(params)
+    if store is None:
+        return solve()
+
+    log = ProgressReporter(progress).log
+    key = store.key(params)
+    result = store.get(key)
+    if result is not None and params.get("instrument", False) and result.get("stats") is None:
+        log(f"[!] Stored result ({key[:12]}) has no stats, solving again to record them")
+        result = None
+    if result is not None:
+        points, cells, point_data = result["result_mesh"]
+        summary = {name: value for name, value in result.items() if name not in RUN_ENTRIES + ("stats",)}
+        result["output_file"] = write_results(params.get("output_dir", "output"), points, cells, point_data, params,
+                                              params.get("output_format", "vtu"), summary=summary,
+                                              name="mode_shapes" if result.get("analysis") == "modal"
+                                              else "deformed_shaft")
+        log(f"[✓] Result store hit ({key[:12]}), results saved to {result['output_file']}")
+        return result
+
+    result = solve()
+    store.put(key, params, result)
+    return {**result, "store_key": key}
+
+
+def solve_analysis(params, progress=None):
+    """
+    solve_fea without the result store: always solves.
+    """
+    analysis = params.get("analysis", "static")
+    if analysis not in ANALYSES:
+        raise ValueError(f"Invalid analysis '{analysis}', expected one of {ANALYSES}")
+    if analysis == "modal":
+        model = ShaftModel(params)
+        try:
+            return model.solve_modal(progress)
+        finally:
+            model.close()
+
+    if params.get("adaptive", False):
+        from solver.adaptive import solve_adaptive
+
+        return solve_adaptive(params, progress)
+    if use_axisymmetric(params):
+        from solver.axisymmetric import solve_axisymmetric
+
+        return solve_axisymmetric(params, progress)
+
+    model = ShaftModel(params)
+    try:
+        return model.solve(progress)
+    finally:
+        model.close()
+
+
+def use_axisymmetric(params):
+    """
+    Whether params selects the 2D axisymmetric solver. params["axisymmetric"] is
+    "auto" (default: when load_type has no bending component), True or False.
+    """
+    mode = params.get("axisymmetric", "auto")
+    has_bending = "bending" in [part.strip().lower() for part in params["load_type"].split("+")]
+    if mode == "auto":
+        return not has_bending
+    if mode is True and has_bending:
+        raise ValueError("Bending loads are not axisymmetric, set axisymmetric to 'auto' or False")
+    if mode not in (True, False):
+        raise ValueError(f"Invalid axisymmetric mode '{mode}', expected 'auto', True or False")
+    return mode
+
+
+class ShaftModel:
+    """
+    Long-lived FEA session for one shaft.
+
+    Holds the mesh, element geometry, assembled stiffness, boundary-condition
+    reduction and factorization between solves, and tracks which params each
+    of them depends on, so solve() after update() recomputes only the stages
+    whose inputs changed. K is assembled for E = 1: it is linear in E at fixed
+    nu, so changing E only rescales the displacement and needs no re-assembly
+    or re-factorization.
+
+    mesh, a tuple (points, cells, face_nodes), fixes the mesh instead of meshing
+    the shaft from length, radius and element_size.
+    """
+
+    # Cached stage -> the params and upstream stages it depends on
+    DEPENDENCIES = {
+        "mesh": ("length", "radius", "element_size", "element_order", "mesh_cache"),
+        "pool": ("mesh", "workers"),
+        "geometry": ("mesh", "assembly"),
+        "stiffness": ("geometry", "nu", "assembly", "workers"),
+        "boundary": ("mesh",),
+        "reduction": ("stiffness", "boundary", "constraints"),
+        "factorization": ("reduction", "solver", "preconditioner", "solver_tol", "solver_maxiter"),
+        "loads": ("boundary", "load_type", "load_value", "bending_pos", "bending_patch_radius"),
+        "displacement": ("factorization", "loads", "E"),
+        "stress": ("displacement", "geometry", "E", "nu", "stress_tensor"),
+        "mass": ("mesh", "geometry", "lumped_mass"),
+        "modes": ("reduction", "factorization", "mass", "num_modes"),
+    }
+
+    def __init__(self, params, mesh=None):
+        self.params = dict(params)
+        self.mesh = mesh
+        self.recomputed = []
+        self._cache = {}  # stage -> (signature, value)
+        self._log = print
+
+    def close(self):
+        """
+        Stop the worker processes of a parallel session, if any.
+        """
+        for _, value in self._cache.values():
+            if isinstance(value, ElementPool):
+                value.close()
+        self._cache.clear()
+
+    def update(self, params=None, **changes):
+        """
+        Change params; affected stages are recomputed lazily by the next solve().
+        """
+        self.params.update(params or {}, **changes)
+
+    def solve(self, progress=None):
+        """
+        Bring every stage up to date with self.params, write the result and return
+        the same dict as solve_fea, plus the list of stages that were recomputed.
+        """
+        params = self.params
+        recorder = make_recorder(params)
+        reporter = ProgressReporter(progress, recorder)
+        log = self._log = reporter.log
+        self.recomputed = []
+
+        reporter.stage("mesh")
+        points, cells, face_nodes = self._get("mesh")
+        self._get("pool")
+        num_nodes = len(points)
+        total_dofs = num_nodes * 3
+
+        reporter.stage("assemble")
+        K_unit = self._get("stiffness")
+
+        reporter.stage("bc")
+        K_reduced, free_dofs = self._get("reduction")
+        self._get("loads")
+
+        reporter.stage("solve")
+        U, solve_info = self._get("displacement")
+
+        reporter.stage("stress")
+        point_data = self._get("stress")
+
+        reporter.stage("write")
+        summary = {
+            "num_nodes": num_nodes,
+            "num_elements": len(cells),
+            "num_dofs": total_dofs,
+            "reduced_dofs": K_reduced.shape[0],
+            "max_displacement": float(np.max(np.linalg.norm(point_data["Displacement"], axis=1))),
+            "max_von_mises": float(np.max(point_data["Von_Mises"])),
+        }
+
+        output_file = write_results(params.get("output_dir", "output"), points, cells, point_data,
+                                    params, params.get("output_format", "vtu"), summary=summary)
+
+        log(f"[✓] FEA completed and results saved to {output_file}")
+        log(f"[✓] Recomputed: {', '.join(self.recomputed) or 'nothing'}")
+
+        reporter.finish()
+        stats = finish_stats(recorder, params, log, num_nodes=num_nodes, num_elements=len(cells),
+                             num_dofs=total_dofs, nnz=_count_nonzeros(K_unit), reduced_dofs=K_reduced.shape[0],
+                             stiffness_mb=_storage_bytes(K_unit) / 1024**2)
+
+        return {"output_file": output_file, **summary, "solver": solve_info, "stats": stats,
+                "recomputed": list(self.recomputed), "result_mesh": ResultMesh(points, cells, point_data)}
+
+    def solve_modal(self, progress=None):
+        """
+        Natural frequencies and mode shapes of the clamped shaft, reusing the mesh,
+        stiffness, reduction and factorization of the session. The lowest
+        params["num_modes"] (default 6) modes are found for params["density"]
+        (default steel) with a consistent mass matrix, or a lumped one with
+        params["lumped_mass"]. K and M are built for E = 1 and density = 1, so
+        changing either only rescales the frequencies, by sqrt(E / density).
+        Mode shapes are written on the undeformed mesh as point data "Mode_1",
+        "Mode_2", ... scaled to unit peak displacement. Returns a dict with the
+        output file, mesh sizes, "modes" (mode, frequency_hz, rpm and type of each)
+        and "critical_speeds_rpm" (see solver.modal.critical_speeds).
+        """
+        params = self.params
+        recorder = make_recorder(params)
+        reporter = ProgressReporter(progress, recorder)
+        log = self._log = reporter.log
+        self.recomputed = []
+
+        reporter.stage("mesh")
+        points, cells, _ = self._get("mesh")
+        self._get("pool")
+
+        reporter.stage("assemble")
+        K_unit = self._get("stiffness")
+        M_unit = self._get("mass")
+
+        reporter.stage("bc")
+        K_reduced, _ = self._get("reduction")
+
+        reporter.stage("solve")
+        eigenvalues, modes = self._get("modes")
+
+        reporter.stage("write")
+        density = params.get("density", DEFAULT_DENSITY)
+        frequencies = np.sqrt(np.maximum(eigenvalues, 0.0) * params["E"] / density) / (2 * np.pi)
+        types = classify_modes(points, modes, M_unit)
+        mode_table = [{"mode": i + 1, "frequency_hz": float(f), "rpm": float(60.0 * f), "type": mode_type}
+                      for i, (f, mode_type) in enumerate(zip(frequencies, types))]
+        for mode in mode_table:
+            log(f"[✓] Mode {mode['mode']}: {mode['frequency_hz']:.2f} Hz ({mode['rpm']:.0f} rpm), {mode['type']}")
+        speeds = critical_speeds(frequencies, types)
+        log("[✓] Critical speeds: " + (", ".join(f"{rpm:.0f} rpm" for rpm in speeds) or "none in the computed modes"))
+
+        point_data = {f"Mode_{i + 1}": shape for i, shape in enumerate(normalized_mode_shapes(modes))}
+        summary = {
+            "num_nodes": len(points),
+            "num_elements": len(cells),
+            "num_dofs": len(points) * 3,
+            "reduced_dofs": K_reduced.shape[0],
+            "frequencies_hz": [mode["frequency_hz"] for mode in mode_table],
+            "critical_speeds_rpm": speeds,
+        }
+        output_file = write_results(params.get("output_dir", "output"), points, cells, point_data, params,
+                                    params.get("output_format", "vtu"), name="mode_shapes", summary=summary)
+        log(f"[✓] Modal analysis completed and mode shapes saved to {output_file}")
+        log(f"[✓] Recomputed: {', '.join(self.recomputed) or 'nothing'}")
 
-    F = np.zeros(total_dofs)
-
-    # Find nodes on top face (z = max z)
-    z_max = np.max(points[:, 2])
-    load_node_indices = [i for i, (_, _, z) in enumerate(points) if np.isclose(z, z_max, atol=1e-6)]
-
-    # Apply loads dynamically based on load_type and load_value dict
-    for part in load_type.split("+"):
-        part = part.strip().lower()
-        if part == "axial" and load_value.get("axial", 0) != 0:
-            for i in load_node_indices:
-                F[i*3 + 2] += load_value["axial"] / len(load_node_indices)
-        elif part == "bending" and load_value.get("bending", 0) != 0:
-            # Apply bending load at the specified position
-            bending_force = load_value["bending"]
-            target_x, target_y = bending_pos["x"], bending_pos["y"]
-
-            top_node_coords = points[load_node_indices, :2]
-
-            distances = np.linalg.norm(top_node_coords - np.array([target_x, target_y]), axis=1)
-
-            if len(distances) > 0:
-                closest_node_local_idx = np.argmin(distances)
-                closest_node_global_idx = load_node_indices[closest_node_local_idx]
-
-                F[closest_node_global_idx * 3 + 1] += bending_force
-                print(f"[✓] Applied bending load of {bending_force} N at node {closest_node_global_idx} (approx x={points[closest_node_global_idx,0]:.3f}, y={points[closest_node_global_idx,1]:.3f})")
-            else:
-                print("[!] Warning: No nodes found on the top face to apply bending load.")
-
-        elif part == "torsion" and load_value.get("torsion", 0) != 0:
-            for i in load_node_indices:
-                x, y, _ = points[i]
-                F[i*3 + 0] += -y * load_value["torsion"]
-                F[i*3 + 1] += x * load_value["torsion"]
+        reporter.finish()
+        stats = finish_stats(recorder, params, log, num_nodes=len(points), num_elements=len(cells),
+                             num_dofs=len(points) * 3, nnz=_count_nonzeros(K_unit), reduced_dofs=K_reduced.shape[0],
+                             stiffness_mb=_storage_bytes(K_unit) / 1024**2)
+
+        return {"output_file": output_file, "analysis": "modal", **summary, "modes": mode_table, "stats": stats,
+                "recomputed": list(self.recomputed), "result_mesh": ResultMesh(points, cells, point_data)}
+
+    def stage(self, name):
+        """
+        Value of a cached stage (one of DEPENDENCIES), recomputed first if it is out of date.
+        """
+        return self._get(name)
+
+    def _get(self, stage):
+        signature = self._signature(stage)
+        cached = self._cache.get(stage)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        if cached is not None and isinstance(cached[1], ElementPool):
+            cached[1].close()
+        value = getattr(self, "_compute_" + stage)()
+        self._cache[stage] = (signature, value)
+        self.recomputed.append(stage)
+        return value
+
+    def _signature(self, stage):
+        return tuple(
+            self._signature(dependency) if dependency in self.DEPENDENCIES
+            else json.dumps(self.params.get(dependency), sort_keys=True, default=str)
+            for dependency in self.DEPENDENCIES[stage]
+        )
+
+    def _compute_mesh(self):
+        if self.mesh is not None:
+            points, cells, _ = self.mesh
+            self._log(f"[✓] Mesh: {len(points)} nodes, {len(cells)} tetra elements")
+            return self.mesh
+        return load_shaft_mesh(self.params, self._log)
+
+    def _compute_pool(self):
+        # workers unset keeps the serial in-process loops
+        if self.params.get("workers") is None:
+            return None
+        points, cells, _ = self._get("mesh")
+        pool = ElementPool(points, cells, self.params["workers"])
+        self._log(f"[✓] Element loops run on {pool.workers} worker process(es)")
+        return pool
+
+    def _compute_geometry(self):
+        points, cells, _ = self._get("mesh")
+        # The matrix-free operator works from grad_N alone; skip the much larger B matrices
+        return compute_element_geometry(points, cells, with_B=self.params.get("assembly", "sparse") != "matrix-free")
+
+    def _compute_stiffness(self):
+        points, cells, _ = self._get("mesh")
+        D_unit = get_elasticity_matrix(1.0, self.params["nu"])
+        assembly = self.params.get("assembly", "sparse")
+        pool = self._get("pool")
+        if pool is not None and assembly == "sparse":
+            return assemble_stiffness(points, cells, D_unit, assembly, pool=pool, log=self._log)
+        return assemble_stiffness(points, cells, D_unit, assembly, self._get("geometry"), log=self._log)
+
+    def _compute_boundary(self):
+        points, cells, face_nodes = self._get("mesh")
+        regions = build_face_regions(points, cells, face_nodes)
+        self._log("[✓] Boundary regions: " + ", ".join(
+            f"{name} {len(region.nodes)} nodes, {region.areas.sum():.4g} m^2" for name, region in regions.items()))
+        return regions
+
+    def _compute_reduction(self):
+        K_unit = self._get("stiffness")
+        fixed_dofs = fixed_face_dofs(self._get("boundary")["bottom"].nodes)
+
+        self._log("[✓] Applying boundary conditions...")
+        # "eliminate" modifies K_unit in place; re-applying it to the same fixed DOFs is a no-op
+        K_reduced, _, free_dofs = apply_boundary_conditions(K_unit, np.zeros(K_unit.shape[0]), fixed_dofs,
+                                                            self.params.get("constraints", "reduce"))
+
+        self._log(f"System size before BC: {K_unit.shape[0]} DOFs")
+        self._log(f"System size after BC: {K_reduced.shape[0]} DOFs")
+        return K_reduced, free_dofs
+
+    def _compute_factorization(self):
+        K_reduced, _ = self._get("reduction")
+        return Factorization(K_reduced, **_solver_options(self.params))
+
+    def _compute_mass(self):
+        points, cells, _ = self._get("mesh")
+        lumped = self.params.get("lumped_mass", False)
+        self._log(f"[✓] Assembling {'lumped' if lumped else 'consistent'} mass matrix...")
+        return assemble_global_mass(points, cells, 1.0, self._get("geometry"), lumped)
+
+    def _compute_modes(self):
+        K_reduced, free_dofs = self._get("reduction")
+        M_unit = self._get("mass")
+        num_modes = self.params.get("num_modes", 6)
+
+        if len(free_dofs) == M_unit.shape[0]:
+            # "eliminate" constraints keep the fixed DOFs, which would show up as spurious modes
+            fixed_dofs = fixed_face_dofs(self._get("boundary")["bottom"].nodes)
+            K_reduced, _, free_dofs = apply_boundary_conditions(K_reduced, np.zeros(len(free_dofs)), fixed_dofs)
+            factorization = Factorization(K_reduced, **_solver_options(self.params))
         else:
-            if part not in ["axial", "bending", "torsion"]:
-                raise ValueError(f"Invalid load component '{part}' in load_type '{load_type}'")
+            factorization = self._get("factorization")
+        M_reduced = M_unit[free_dofs][:, free_dofs]
 
-    # Fix nodes at bottom (z = min z)
-    fixed_dofs = []
-    z_min = np.min(points[:, 2])
-    for i, (_, _, z) in enumerate(points):
-        if np.isclose(z, z_min, atol=1e-6):
-            fixed_dofs.extend([i*3, i*3 + 1, i*3 + 2])
+        self._log(f"[✓] Computing the lowest {num_modes} modes (shift-invert Lanczos)...")
+        eigenvalues, vectors = modal_analysis(K_reduced, M_reduced, num_modes, factorization)
+        modes = np.zeros((M_unit.shape[0], num_modes))
+        modes[free_dofs] = vectors
+        return eigenvalues, modes
 
-    print("[✓] Applying boundary conditions...")
-    K_reduced, F_reduced, free_dofs = apply_boundary_conditions(K, F, fixed_dofs)
+    def _compute_loads(self):
+        points, _, _ = self._get("mesh")
+        params = self.params
+        return build_load_vector(points, self._get("boundary")["top"], params["load_type"],
+                                 params["load_value"],  # Dict with keys: 'axial', 'bending', 'torsion'
+                                 params.get("bending_pos", {"x": 0.0, "y": 0.0}),
+                                 params.get("bending_patch_radius"), self._log)
 
-    print(f"System size before BC: {total_dofs} DOFs")
-    print(f"System size after BC: {K_reduced.shape[0]} DOFs")
+    def _compute_displacement(self):
+        factorization = self._get("factorization")
+        _, free_dofs = self._get("reduction")
+        F = self._get("loads")
 
-    print("[✓] Solving system...")
-    U_reduced = np.linalg.solve(K_reduced, F_reduced)
+        self._log("[✓] Solving system...")
+        U_reduced, solve_info = factorization.solve(F[free_dofs])
+        if "factorization" in self.recomputed:
+            solve_info["time"] += factorization.factor_time
+        _print_solve_info(solve_info, self._log)
+
+        # K = E * K_unit, so U = U_unit / E
+        U = np.zeros(len(F))
+        U[free_dofs] = U_reduced / self.params["E"]
+        return U, solve_info
+
+    def _compute_stress(self):
+        points, cells, _ = self._get("mesh")
+        U, _ = self._get("displacement")
+        D = get_elasticity_matrix(self.params["E"], self.params["nu"])
+
+        self._log("[✓] Computing von Mises stress...")
+        pool = self._get("pool")
+        if pool is not None:
+            sigma, valid = pool.element_stress(U, D)
+        else:
+            geometry = self._get("geometry")
+            _, sigma = compute_element_stress(cells, U, D, geometry)
+            valid = geometry.volumes > 0
+
+        point_data = {"Displacement": U.reshape((-1, 3))}
+        if self.params.get("stress_tensor", False):
+            # Nodal stress tensor in Voigt order xx, yy, zz, xy, yz, zx
+            point_data["Von_Mises"], point_data["Stress"] = nodal_stress(cells, sigma, valid, len(points),
+                                                                         return_tensor=True)
+        else:
+            point_data["Von_Mises"] = nodal_stress(cells, sigma, valid, len(points))
+        return point_data
 
-    U = np.zeros(total_dofs)
+
+def solve_load_cases(params, load_cases):
+    """
+    Solve several load cases on the same shaft with a single factorization.
+    Each load case is a dict with 'load_type', 'load_value' and optionally
+    'bending_pos' and 'name'; geometry, material and solver settings come from params.
+    Returns one dict per case with 'name', 'displacement' (N, 3) and 'von_mises' (N,).
+    """
+    points, cells, face_nodes = load_shaft_mesh(params)
+    num_nodes = len(points)
+    total_dofs = num_nodes * 3
+
+    D = get_elasticity_matrix(params["E"], params["nu"])
+    geometry = compute_element_geometry(points, cells)
+    K = assemble_stiffness(points, cells, D, params.get("assembly", "sparse"), geometry)
+
+    regions = build_face_regions(points, cells, face_nodes)
+    fixed_dofs = fixed_face_dofs(regions["bottom"].nodes)
+
+    # One right-hand side column per load case
+    F = np.zeros((total_dofs, len(load_cases)))
+    for j, case in enumerate(load_cases):
+        F[:, j] = build_load_vector(points, regions["top"], case["load_type"], case["load_value"],
+                                    case.get("bending_pos", {"x": 0.0, "y": 0.0}), params.get("bending_patch_radius"))
+
+    print("[✓] Applying boundary conditions...")
+    K_reduced, F_reduced, free_dofs = apply_boundary_conditions(K, F, fixed_dofs, params.get("constraints", "reduce"))
+
+    print(f"[✓] Factorizing {K_reduced.shape[0]} DOFs once for {len(load_cases)} load cases...")
+    factorization = Factorization(K_reduced, **_solver_options(params))
+    U_reduced, solve_info = factorization.solve(F_reduced)
+    _print_solve_info(solve_info)
+
+    U = np.zeros((total_dofs, len(load_cases)))
     U[free_dofs] = U_reduced
 
     print("[✓] Computing von Mises stress...")
-    stress = compute_von_mises_stress(points, cells, U, D)
+    results = []
+    for j, case in enumerate(load_cases):
+        results.append({
+            "name": case.get("name", case["load_type"]),
+            "displacement": U[:, j].reshape((-1, 3)),
+            "von_mises": compute_von_mises_stress(points, cells, U[:, j], D, geometry),
+        })
+    return results
+
+
+def superpose_load_cases(results, factors):
+    """
+    Linearly combine displacement fields of solved load cases, e.g. for load envelopes.
+    von Mises stress is not linear in the loads, so only displacements are combined.
+    """
+    return sum(factor * result["displacement"] for factor, result in zip(factors, results))
+
+
+def load_shaft_mesh(params, log=print):
+    """
+    Return points, tetra connectivity and end-face node indices of the shaft mesh for params.
+    params["element_order"] = 2 meshes with quadratic TET10 elements (default 1, linear).
+    Meshes are reused from the on-disk mesh cache unless params["mesh_cache"] is False.
+    """
+    cache = MeshCache() if params.get("mesh_cache", True) else False
+    # Pass element_size to the mesh generation function
+    points, cells, face_nodes = get_shaft_mesh(length=params["length"], radius=params["radius"],
+                                   element_size=params["element_size"], cache=cache, log=log,
+                                   element_order=params.get("element_order", 1))
+
+    log(f"[✓] Mesh: {len(points)} nodes, {len(cells)} tetra elements")
+    return points, cells, face_nodes
+
+
+def assemble_stiffness(points, cells, D, assembly="sparse", geometry=None, pool=None, log=print):
+    """
+    Assemble K with the "sparse" (CSR) or "dense" (reference, small meshes only) path,
+    or with "matrix-free" return an ElementStiffnessOperator that never assembles K.
+    An ElementPool runs the sparse assembly on its worker processes.
+    """
+    log(f"[✓] Assembling global stiffness matrix ({assembly})...")
+    if assembly == "sparse" and pool is not None:
+        K = pool.stiffness(D)
+    elif assembly == "sparse":
+        K = assemble_global_stiffness_sparse(points, cells, D, geometry)
+    elif assembly == "dense":
+        K = assemble_global_stiffness(points, cells, D)
+    elif assembly == "matrix-free":
+        if geometry is None:
+            geometry = compute_element_geometry(points, cells)
+        K = ElementStiffnessOperator(cells, D, geometry, len(points) * 3)
+    else:
+        raise ValueError(f"Invalid assembly mode '{assembly}', expected 'sparse', 'dense' or 'matrix-free'")
+    log(f"[✓] Stiffness storage: {_storage_bytes(K) / 1024**2:.1f} MiB")
+    return K
+
+
+def _count_nonzeros(K):
+    if isinstance(K, ElementStiffnessOperator):
+        return None
+    return int(K.nnz) if hasattr(K, "nnz") else int(np.count_nonzero(K))
+
+
+def _storage_bytes(K):
+    """
+    Memory held by K: the CSR arrays, the dense array, or the element data of a matrix-free operator.
+    """
+    if sp.issparse(K):
+        return K.data.nbytes + K.indices.nbytes + K.indptr.nbytes
+    return K.nbytes
+
 
-    output_dir = "output"
-    os.makedirs(output_dir, exist_ok=True)
-    deformed_points = points + U.reshape((-1, 3))
+def _solver_options(params):
+    return {
+        "backend": params.get("solver", "auto"),  # "auto", "dense", "direct", "cholesky" or "cg"
+        "preconditioner": params.get("preconditioner", "jacobi"),  # CG only: "jacobi", "ilu" or "none"
+        "tol": params.get("solver_tol", 1e-10),
+        "maxiter": params.get("solver_maxiter"),
+    }
 
-    meshio.write(
-        os.path.join(output_dir, "deformed_shaft.vtk"),
-        meshio.Mesh(points=deformed_points, cells={"tetra": cells},
-                    point_data={"Displacement": U.reshape((-1, 3)), "Von_Mises": stress}),
-    )
 
-    print("[✓] FEA completed and results saved to output/deformed_shaft.vtk")
+def _print_solve_info(solve_info, log=print):
+    log(f"[✓] Solver: {solve_info['backend']}"
+          + (f" ({solve_info['preconditioner']})" if solve_info["preconditioner"] else "")
+          + f", {solve_info['iterations']} iterations, residual {solve_info['residual']:.2e},"
+          f" {solve_info['time']:.3f} s")
@@ -1,7 +1,38 @@
 import os
 import subprocess
+import tempfile
 
-def generate_shaft_mesh(length=1.0, radius=0.05, element_size=None, mesh_file="output/shaft.vtk"): # Added element_size parameter
+import numpy as np
+
+# Name of the background size field view written next to the .geo file
+SIZE_FIELD_FILE = "size_field.pos"
+
+# meshio cell type of the tetrahedra of each element order
+TETRA_CELL_TYPES = {1: "tetra", 2: "tetra10"}
+
+# gmsh numbers the last two TET10 edge nodes (edges 23 and 13) the other way round from VTK
+GMSH_TO_VTK_TET10 = [0, 1, 2, 3, 4, 5, 6, 7, 9, 8]
+
+
+def generate_shaft_mesh(length=1.0, radius=0.05, element_size=None, mesh_file="output/shaft.vtk", in_process=False,
+                        log=print, size_field=None, element_order=1): # Added element_size parameter
+    """
+    Mesh the shaft with gmsh.
+
+    By default gmsh is run as a subprocess and the path of the written VTK file is returned.
+    With in_process=True the mesh is built through the gmsh Python API without temporary
+    files and (points, cells, face_nodes) is returned, where face_nodes maps "top" and
+    "bottom" to the node indices of the end faces. If the gmsh Python bindings are not
+    available the subprocess path is used and its output read back instead.
+    Status lines go to log (default print).
+
+    size_field, a tuple (points, cells, sizes) of a background tetra mesh with target
+    element sizes at its nodes, replaces the uniform element_size, e.g. for adaptive
+    refinement. element_size then only bounds the largest elements.
+
+    element_order=2 generates quadratic TET10 elements, returned with their nodes in
+    VTK order (corners, then the midside nodes of edges 01, 12, 02, 03, 13, 23).
+    """
     # If element_size is not provided, use default calculation based on radius
     if element_size is None:
         cl_min = radius / 3
@@ -11,19 +42,175 @@ def generate_shaft_mesh(length=1.0, radius=0.05, element_size=None, mesh_file="o
         # or you could derive min/max from it (e.g., element_size / 2, element_size)
         cl_min = element_size
         cl_max = element_size * 1.5 # Allow some variation if desired, or just use element_size for both
+    if size_field is not None:
+        cl_min = float(np.min(size_field[2]))
+        cl_max = max(cl_max, float(np.max(size_field[2])))
+
+    if in_process:
+        gmsh = _start_gmsh_api(log)
+        if gmsh is not None:
+            return _generate_shaft_mesh_api(gmsh, length, radius, cl_min, cl_max, log, size_field, element_order)
 
     geo_code = f"""
 SetFactory("OpenCASCADE");
 Cylinder(1) = {{0, 0, 0, 0, 0, {length}, {radius}}};
 Mesh.CharacteristicLengthMin = {cl_min};
 Mesh.CharacteristicLengthMax = {cl_max};
-Mesh 3;
+Mesh.ElementOrder = {element_order};
+"""
+    if size_field is not None:
+        geo_code += f"""
+Merge "{SIZE_FIELD_FILE}";
+Field[1] = PostView;
+Field[1].ViewIndex = 0;
+Background Field = 1;
+Mesh.CharacteristicLengthExtendFromBoundary = 0;
+Mesh.CharacteristicLengthFromPoints = 0;
+Mesh.CharacteristicLengthFromCurvature = 0;
 """
-    os.makedirs("output", exist_ok=True)
-    geo_file = "output/shaft.geo"
+    geo_code += "Mesh 3;\n"
+
+    if not in_process:
+        _run_gmsh(geo_code, mesh_file, log, size_field)
+        return mesh_file
+
+    import meshio
+
+    # Private scratch directory so concurrent runs don't overwrite each other's files
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mesh_file = _run_gmsh(geo_code, os.path.join(tmp_dir, "shaft.vtk"), log, size_field)
+        mesh = meshio.read(mesh_file)
+    points = mesh.points
+    return points, mesh.cells_dict[TETRA_CELL_TYPES[element_order]], find_face_nodes(points)
+
+
+def _run_gmsh(geo_code, mesh_file, log=print, size_field=None):
+    """
+    Write geo_code (and the size field as a .pos view) next to mesh_file and mesh it with the gmsh executable.
+    """
+    mesh_dir = os.path.dirname(mesh_file) or "."
+    os.makedirs(mesh_dir, exist_ok=True)
+    if size_field is not None:
+        write_size_field_pos(os.path.join(mesh_dir, SIZE_FIELD_FILE), *size_field)
+    geo_file = os.path.join(mesh_dir, "shaft.geo")
     with open(geo_file, "w") as f:
         f.write(geo_code)
 
     subprocess.run(["gmsh", geo_file, "-3", "-format", "vtk", "-o", mesh_file], check=True)
-    print(f"[✓] Mesh generated at {mesh_file}")
+    log(f"[✓] Mesh generated at {mesh_file}")
     return mesh_file
+
+
+def _start_gmsh_api(log=print):
+    """
+    Import and initialize the gmsh Python API. Returns the gmsh module, or None
+    (after logging why) if the bindings can't be used, so the caller falls back
+    to the gmsh executable.
+    """
+    try:
+        import gmsh
+    except (ImportError, OSError, ValueError) as exc:
+        # OSError: bindings present but libgmsh failed to load. ValueError: old
+        # bindings set a SIGINT handler on import, which fails off the main thread.
+        log(f"[!] gmsh Python API unavailable ({exc}), falling back to the gmsh executable")
+        return None
+
+    try:
+        # Not interruptible: gmsh must not install signal handlers, so meshing also works off the main thread
+        gmsh.initialize(interruptible=False)
+    except TypeError:
+        # Bindings before gmsh 4.11 have no interruptible keyword and always set a SIGINT handler
+        try:
+            gmsh.initialize()
+        except ValueError as exc:
+            log(f"[!] gmsh {gmsh.__version__} Python API needs the main thread ({exc}), "
+                f"falling back to the gmsh executable")
+            return None
+    return gmsh
+
+
+def _generate_shaft_mesh_api(gmsh, length, radius, cl_min, cl_max, log=print, size_field=None, element_order=1):
+    """
+    Build and mesh the cylinder through the initialized gmsh API and return NumPy arrays.
+    """
+    try:
+        gmsh.option.setNumber("General.Terminal", 0)
+        gmsh.model.add("shaft")
+        volume = gmsh.model.occ.addCylinder(0, 0, 0, 0, 0, length, radius)
+        gmsh.model.occ.synchronize()
+
+        # Tag the end faces as physical groups so the solver doesn't rediscover them by z-coordinate
+        face_groups = {}
+        for dim, tag in gmsh.model.getBoundary([(3, volume)], oriented=False):
+            z = gmsh.model.occ.getCenterOfMass(dim, tag)[2]
+            if np.isclose(z, length):
+                face_groups["top"] = gmsh.model.addPhysicalGroup(2, [tag], name="top")
+            elif np.isclose(z, 0.0):
+                face_groups["bottom"] = gmsh.model.addPhysicalGroup(2, [tag], name="bottom")
+        gmsh.model.addPhysicalGroup(3, [volume], name="shaft")
+
+        gmsh.option.setNumber("Mesh.CharacteristicLengthMin", cl_min)
+        gmsh.option.setNumber("Mesh.CharacteristicLengthMax", cl_max)
+        gmsh.option.setNumber("Mesh.ElementOrder", element_order)
+        if size_field is not None:
+            background_points, background_cells, sizes = size_field
+            # List data of a scalar tetrahedron: x1..x4, y1..y4, z1..z4, then the 4 nodal values
+            data = np.concatenate([background_points[background_cells].transpose(0, 2, 1).reshape(-1, 12),
+                                   sizes[background_cells]], axis=1)
+            view = gmsh.view.add("size_field")
+            gmsh.view.addListData(view, "SS", len(background_cells), data.ravel())
+            field = gmsh.model.mesh.field.add("PostView")
+            gmsh.model.mesh.field.setNumber(field, "ViewTag", view)
+            gmsh.model.mesh.field.setAsBackgroundMesh(field)
+            gmsh.option.setNumber("Mesh.CharacteristicLengthExtendFromBoundary", 0)
+            gmsh.option.setNumber("Mesh.CharacteristicLengthFromPoints", 0)
+            gmsh.option.setNumber("Mesh.CharacteristicLengthFromCurvature", 0)
+        gmsh.model.mesh.generate(3)
+
+        node_tags, coords, _ = gmsh.model.mesh.getNodes()
+        points = coords.reshape(-1, 3)
+
+        # gmsh node tags are not guaranteed to be contiguous, map them to array indices
+        tag_to_index = np.zeros(int(node_tags.max()) + 1, dtype=np.int64)
+        tag_to_index[node_tags.astype(np.int64)] = np.arange(len(node_tags))
+
+        tet_type = gmsh.model.mesh.getElementType("Tetrahedron", element_order)
+        _, tet_nodes = gmsh.model.mesh.getElementsByType(tet_type)
+        cells = tag_to_index[tet_nodes.astype(np.int64)].reshape(-1, 4 if element_order == 1 else 10)
+        if element_order == 2:
+            cells = cells[:, GMSH_TO_VTK_TET10]
+
+        face_nodes = {}
+        for name, group in face_groups.items():
+            group_tags, _ = gmsh.model.mesh.getNodesForPhysicalGroup(2, group)
+            face_nodes[name] = np.sort(tag_to_index[group_tags.astype(np.int64)])
+    finally:
+        gmsh.finalize()
+
+    log(f"[✓] Mesh generated in-process ({len(points)} nodes)")
+    return points, cells, face_nodes
+
+
+def write_size_field_pos(path, points, cells, sizes):
+    """
+    Write nodal target sizes on a tetra mesh as a gmsh .pos scalar view, for use as a background field.
+    """
+    coords = points[cells].reshape(len(cells), 12)  # x1, y1, z1, ..., x4, y4, z4
+    values = sizes[cells]
+    with open(path, "w") as f:
+        f.write('View "size_field" {\n')
+        for xyz, value in zip(coords, values):
+            f.write(f"SS({','.join(map(repr, xyz.tolist()))}){{{','.join(map(repr, value.tolist()))}}};\n")
+        f.write("};\n")
+
+
+def find_face_nodes(points, atol=1e-6):
+    """
+    Find the end-face nodes of a shaft mesh by z-coordinate.
+    Returns a dict mapping "top" and "bottom" to node index arrays.
+    """
+    z = points[:, 2]
+    return {
+        "top": np.flatnonzero(np.isclose(z, z.max(), atol=atol)),
+        "bottom": np.flatnonzero(np.isclose(z, z.min(), atol=atol)),
+    }
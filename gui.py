@@ -0,0 +1,515 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+# NumPy, PyVista and the solver are imported where they are first needed, so the window opens at once
+from solver.instrumentation import STAGES, format_stats
+from solver.worker import SolverWorker
+import os
+import time
+
+
+class FEAShaftGUI(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title("Shaft FEA Simulator")
+        self.geometry("450x820") # Increased height again to accommodate progress bar and log
+
+        self.load_types = {
+            "axial": ["Axial Load (N)"],
+            "bending": ["Bending Load (N)"], # This will be the magnitude of the force for bending
+            "torsion": ["Torsion Load (Nm)"],
+            "axial+bending": ["Axial Load (N)", "Bending Load (N)"],
+            "axial+torsion": ["Axial Load (N)", "Torsion Load (Nm)"],
+            "bending+torsion": ["Bending Load (N)", "Torsion Load (Nm)"], # Torsion is the resultant torque on the top face
+            "axial+bending+torsion": ["Axial Load (N)", "Bending Load (N)", "Torsion Load (Nm)"]
+        }
+
+        # Solves run in a background process; at most one further run is queued behind it
+        self.worker = SolverWorker()
+        self.pending_params = None
+        self.polling = False
+        self.result_file = "output/deformed_shaft.vtu"
+        self.result_data = None  # ResultMesh handed over by the last solve, None for reopened past runs
+        self.result_mesh = None  # PyVista mesh of the result, reused across visualize/animate clicks
+        self.modes = None  # Mode table of the last modal analysis, None after a static run
+
+        self.create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        # The solver process loads NumPy, SciPy and the solver while the parameters are entered
+        self.after_idle(self.worker.start)
+
+    def create_widgets(self):
+        padding = {'padx': 10, 'pady': 5}
+
+        ttk.Label(self, text="Shaft Length (m):").grid(row=0, column=0, sticky='w', **padding)
+        self.length_var = tk.StringVar(value="1.0")
+        ttk.Entry(self, textvariable=self.length_var).grid(row=0, column=1, **padding)
+
+        ttk.Label(self, text="Shaft Radius (m):").grid(row=1, column=0, sticky='w', **padding)
+        self.radius_var = tk.StringVar(value="0.1")
+        ttk.Entry(self, textvariable=self.radius_var).grid(row=1, column=1, **padding)
+
+        ttk.Label(self, text="Young's Modulus E (Pa):").grid(row=2, column=0, sticky='w', **padding)
+        self.E_var = tk.StringVar(value="2e11")
+        ttk.Entry(self, textvariable=self.E_var).grid(row=2, column=1, **padding)
+
+        ttk.Label(self, text="Poisson's Ratio ν:").grid(row=3, column=0, sticky='w', **padding)
+        self.nu_var = tk.StringVar(value="0.3")
+        ttk.Entry(self, textvariable=self.nu_var).grid(row=3, column=1, **padding)
+
+        # New: Mesh Element Size input
+        ttk.Label(self, text="Mesh Element Size (m):").grid(row=4, column=0, sticky='w', **padding)
+        # Default to a value that's reasonable, e.g., radius / 5 or 0.02
+        self.element_size_var = tk.StringVar(value="0.02")
+        ttk.Entry(self, textvariable=self.element_size_var).grid(row=4, column=1, **padding)
+
+
+        ttk.Label(self, text="Load Type:").grid(row=5, column=0, sticky='w', **padding) # Row changed
+        self.load_type_var = tk.StringVar()
+        load_options = list(self.load_types.keys())
+        self.load_type_combo = ttk.Combobox(self, textvariable=self.load_type_var, values=load_options, state="readonly")
+        self.load_type_combo.current(0)
+        self.load_type_combo.grid(row=5, column=1, **padding) # Row changed
+        self.load_type_combo.bind("<<ComboboxSelected>>", self.update_load_inputs)
+
+        self.load_inputs_frame = ttk.Frame(self)
+        self.load_inputs_frame.grid(row=6, column=0, columnspan=2, sticky='w', **padding) # Row changed
+
+        self.load_input_vars = {}
+        # New: Variables for bending load position
+        self.bending_x_var = tk.StringVar(value="0.0")
+        self.bending_y_var = tk.StringVar(value="0.0")
+
+        self.update_load_inputs() # Initialize load inputs frame
+
+        run_frame = ttk.Frame(self)
+        run_frame.grid(row=7, column=0, columnspan=2, pady=10)
+        self.run_button = ttk.Button(run_frame, text="Run FEA", command=self.run_fea)
+        self.run_button.grid(row=0, column=0, padx=5)
+        self.cancel_button = ttk.Button(run_frame, text="Cancel", command=self.cancel_fea, state="disabled")
+        self.cancel_button.grid(row=0, column=1, padx=5)
+        # Element size becomes the coarsest size; the mesh is refined where the estimated error is large
+        self.adaptive_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(run_frame, text="Adaptive mesh", variable=self.adaptive_var).grid(row=0, column=2, padx=5)
+        # TET10 elements: far more accurate per DOF in bending than linear tets
+        self.quadratic_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(run_frame, text="Quadratic elements", variable=self.quadratic_var).grid(row=0, column=3, padx=5)
+        # Natural frequencies and critical speeds of the same shaft; loads are ignored
+        self.modal_button = ttk.Button(run_frame, text="Run Modal Analysis", command=lambda: self.run_fea("modal"))
+        self.modal_button.grid(row=1, column=0, columnspan=2, padx=5, pady=(5, 0))
+        # Runs are kept in the result store and can be reopened without solving again
+        ttk.Button(run_frame, text="Past Runs...", command=self.show_past_runs).grid(row=1, column=2, columnspan=2,
+                                                                                   padx=5, pady=(5, 0))
+
+        self.visualize_button = ttk.Button(self, text="Visualize Results", command=self.visualize_results, state="disabled")
+        self.visualize_button.grid(row=8, column=0, columnspan=2, pady=5) # Row changed
+
+        animate_frame = ttk.Frame(self)
+        animate_frame.grid(row=9, column=0, columnspan=2, pady=5)
+        self.animate_button = ttk.Button(animate_frame, text="Play Animation", command=self.play_animation, state="disabled")
+        self.animate_button.grid(row=0, column=0, padx=5)
+        # Mode shown by Visualize/Play Animation after a modal analysis
+        ttk.Label(animate_frame, text="Mode:").grid(row=0, column=1)
+        self.mode_var = tk.StringVar(value="1")
+        self.mode_spinbox = ttk.Spinbox(animate_frame, from_=1, to=1, textvariable=self.mode_var, width=4, state="disabled")
+        self.mode_spinbox.grid(row=0, column=2, padx=5)
+
+        self.status_label = ttk.Label(self, text="")
+        self.status_label.grid(row=10, column=0, columnspan=2) # Row changed
+
+        self.progress_bar = ttk.Progressbar(self, maximum=len(STAGES), length=400)
+        self.progress_bar.grid(row=11, column=0, columnspan=2, **padding)
+
+        self.log_text = tk.Text(self, height=12, width=60, state="disabled", wrap="none")
+        self.log_text.grid(row=12, column=0, columnspan=2, **padding)
+
+    def update_load_inputs(self, event=None):
+        for widget in self.load_inputs_frame.winfo_children():
+            widget.destroy()
+        self.load_input_vars.clear()
+
+        selected_load = self.load_type_var.get()
+        labels = self.load_types.get(selected_load, [])
+
+        current_row = 0
+        for i, label in enumerate(labels):
+            ttk.Label(self.load_inputs_frame, text=label).grid(row=current_row, column=0, sticky='w', padx=10, pady=2)
+            var = tk.StringVar(value="1000.0")
+            entry = ttk.Entry(self.load_inputs_frame, textvariable=var, width=15)
+            entry.grid(row=current_row, column=1, padx=10, pady=2)
+            self.load_input_vars[label] = var
+            current_row += 1
+
+            # Add bending load position inputs if 'bending' is in the selected load type
+            if "bending" in selected_load:
+                if label == "Bending Load (N)": # Attach position inputs to the Bending Load field
+                    ttk.Label(self.load_inputs_frame, text="Bending X-pos (m):").grid(row=current_row, column=0, sticky='w', padx=10, pady=2)
+                    ttk.Entry(self.load_inputs_frame, textvariable=self.bending_x_var, width=15).grid(row=current_row, column=1, padx=10, pady=2)
+                    current_row += 1
+
+                    ttk.Label(self.load_inputs_frame, text="Bending Y-pos (m):").grid(row=current_row, column=0, sticky='w', padx=10, pady=2)
+                    ttk.Entry(self.load_inputs_frame, textvariable=self.bending_y_var, width=15).grid(row=current_row, column=1, padx=10, pady=2)
+                    current_row += 1
+
+
+    def run_fea(self, analysis="static"):
+        try:
+            params = self.collect_params()
+            params["analysis"] = analysis
+        except ValueError:
+            messagebox.showerror("Input Error", "Please enter valid numeric values.")
+            return
+
+        if self.worker.busy:
+            # Queue the next run behind the current one, replacing any run queued earlier
+            self.pending_params = params
+            self.status_label.config(text="FEA running; next run queued.")
+            return
+
+        self.start_run(params)
+
+    def collect_params(self):
+        params = {
+            "length": float(self.length_var.get()),
+            "radius": float(self.radius_var.get()),
+            "E": float(self.E_var.get()),
+            "nu": float(self.nu_var.get()),
+            "element_size": float(self.element_size_var.get()), # New: Get element size
+            "load_type": self.load_type_var.get(),
+            "load_value": {}, # Initialize as dict
+            "adaptive": self.adaptive_var.get(),
+            "element_order": 2 if self.quadratic_var.get() else 1,
+            "instrument": True # Per-stage timings for the status bar
+        }
+
+        load_val = {"axial": 0.0, "bending": 0.0, "torsion": 0.0}
+        for label, var in self.load_input_vars.items():
+            val = float(var.get())
+            if "Axial" in label:
+                load_val["axial"] = val
+            elif "Bending" in label:
+                load_val["bending"] = val
+            elif "Torsion" in label:
+                load_val["torsion"] = val
+
+        params["load_value"] = load_val
+
+        # Add bending position to params if bending load is selected
+        if "bending" in params["load_type"]:
+            params["bending_pos"] = {
+                "x": float(self.bending_x_var.get()),
+                "y": float(self.bending_y_var.get())
+            }
+        else:
+            params["bending_pos"] = {"x": 0.0, "y": 0.0} # Default if no bending load
+
+        return params
+
+    def start_run(self, params):
+        self.status_label.config(text="Running FEA...")
+        self.progress_bar.config(value=0)
+        self.clear_log()
+        self.cancel_button.config(state="normal")
+        self.worker.submit(params)
+        if not self.polling:
+            self.polling = True
+            self.after(100, self.poll_worker)
+
+    def poll_worker(self):
+        for kind, value in self.worker.poll():
+            if kind == "stage":
+                self.progress_bar.config(value=STAGES.index(value))
+                self.status_label.config(text=f"Running FEA: {value}...")
+            elif kind == "log":
+                self.append_log(value)
+            elif kind == "done":
+                self.on_run_finished(value)
+            elif kind == "error":
+                self.on_run_failed(value)
+
+        if self.worker.busy:
+            self.after(100, self.poll_worker)
+        else:
+            self.polling = False
+
+    def on_run_finished(self, result):
+        self.progress_bar.config(value=len(STAGES))
+        self.cancel_button.config(state="disabled")
+        self.show_result(result)
+
+        if self.pending_params is not None:
+            self.start_next_run()
+        else:
+            messagebox.showinfo("Success", "FEA completed successfully!\nYou can now visualize and animate the results.")
+
+    def show_result(self, result, status="FEA completed successfully."):
+        """
+        Make result the one shown by Visualize and Play Animation, and summarize it in the status bar.
+        """
+        self.result_file = result["output_file"]
+        self.result_data = result.get("result_mesh")
+        self.result_mesh = None
+        self.modes = result.get("modes")
+        if self.modes:
+            status = "Modal analysis completed: " + ", ".join(f"{mode['frequency_hz']:.1f}" for mode in self.modes) \
+                     + " Hz\nCritical speeds: " + (", ".join(f"{rpm:.0f}" for rpm in result["critical_speeds_rpm"])
+                                                 or "none in the computed modes") + " rpm"
+            self.mode_spinbox.config(to=len(self.modes), state="readonly")
+            self.mode_var.set("1")
+        else:
+            self.mode_spinbox.config(state="disabled")
+        if result.get("adaptive"):
+            final = result["adaptive"][-1]
+            status += f"\nAdaptive: {len(result['adaptive'])} iterations, {final['num_dofs']} DOFs, " \
+                      f"error {100 * final['error']:.1f}%"
+        if result.get("stats"):
+            status += f"\n{format_stats(result['stats'])}"
+        self.status_label.config(text=status)
+        self.visualize_button.config(state="normal")
+        self.animate_button.config(state="normal")
+
+    def show_past_runs(self):
+        """
+        List the runs in the result store, newest first, and reopen the selected one.
+        """
+        from solver.result_store import ResultStore
+
+        runs = {run["key"]: run for run in ResultStore().query()}
+        if not runs:
+            messagebox.showinfo("Past Runs", "No stored runs yet.")
+            return
+
+        window = tk.Toplevel(self)
+        window.title("Past Runs")
+        columns = {"date": "Date", "analysis": "Analysis", "load_type": "Load Type", "element_size": "Element Size (m)",
+                   "result": "Result"}
+        tree = ttk.Treeview(window, columns=list(columns), show="headings", height=15)
+        for name, heading in columns.items():
+            tree.heading(name, text=heading)
+            tree.column(name, width=150 if name in ("load_type", "result") else 100)
+        for key, run in runs.items():
+            params, result = run["params"], run["result"]
+            analysis = params.get("analysis", "static")
+            if analysis == "modal":
+                summary = f"{result['frequencies_hz'][0]:.1f} Hz first mode"
+            else:
+                summary = f"{result['max_von_mises']:.3e} Pa max VM"
+            tree.insert("", "end", iid=key, values=(
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(run["created"])), analysis,
+                "-" if analysis == "modal" else params["load_type"], f"{params['element_size']:g}", summary))
+        tree.grid(row=0, column=0, padx=10, pady=10)
+
+        def open_selected(event=None):
+            selection = tree.selection()
+            if not selection:
+                return
+            run = runs[selection[0]]
+            self.show_result({**run["result"], "output_file": run["output_file"]},
+                             status=f"Reopened run from {time.strftime('%Y-%m-%d %H:%M', time.localtime(run['created']))}.")
+            window.destroy()
+
+        tree.bind("<Double-1>", open_selected)
+        ttk.Button(window, text="Open", command=open_selected).grid(row=1, column=0, pady=(0, 10))
+
+    def on_run_failed(self, message):
+        self.cancel_button.config(state="disabled")
+        self.status_label.config(text="Simulation failed.")
+        self.visualize_button.config(state="disabled")
+        self.animate_button.config(state="disabled")
+
+        if self.pending_params is not None:
+            self.start_next_run()
+        messagebox.showerror("Error", f"FEA simulation failed:\n{message}")
+
+    def start_next_run(self):
+        params, self.pending_params = self.pending_params, None
+        self.start_run(params)
+
+    def cancel_fea(self):
+        self.worker.cancel()
+        self.pending_params = None
+        self.cancel_button.config(state="disabled")
+        self.progress_bar.config(value=0)
+        self.status_label.config(text="FEA cancelled.")
+        self.append_log("[!] Cancelled by user")
+
+    def append_log(self, line):
+        self.log_text.config(state="normal")
+        self.log_text.insert("end", line + "\n")
+        self.log_text.see("end")
+        self.log_text.config(state="disabled")
+
+    def clear_log(self):
+        self.log_text.config(state="normal")
+        self.log_text.delete("1.0", "end")
+        self.log_text.config(state="disabled")
+
+    def on_close(self):
+        self.worker.shutdown()
+        self.destroy()
+
+    def visualize_results(self):
+        mesh = self.load_result_mesh()
+        if mesh is None:
+            return
+        if self.modes:
+            self.visualize_mode(mesh)
+            return
+
+        displacement = mesh.point_data.get("Displacement")
+        if displacement is None:
+            messagebox.showerror("Data Error", "Displacement data not found in the result.")
+            return
+
+        import pyvista as pv
+
+        # Result meshes hold the undeformed points
+        deformed_mesh = mesh.copy()
+        deformed_mesh.points = mesh.points + displacement
+
+        plotter = pv.Plotter()
+        plotter.add_mesh(deformed_mesh, scalars="Von_Mises", show_edges=True, cmap="jet")
+        plotter.add_scalar_bar(title="Von Mises Stress")
+        plotter.show()
+
+    def selected_mode(self, mesh):
+        """
+        Shape of the mode chosen in the spinbox, its table entry and a display scale of 10% of the shaft length.
+        """
+        import numpy as np
+
+        mode = self.modes[int(self.mode_var.get()) - 1]
+        shape = np.asarray(mesh.point_data[f"Mode_{mode['mode']}"])
+        scale = 0.1 * np.ptp(mesh.points[:, 2])
+        return shape, mode, scale
+
+    def visualize_mode(self, mesh):
+        import numpy as np
+        import pyvista as pv
+
+        shape, mode, scale = self.selected_mode(mesh)
+        mode_mesh = mesh.copy()
+        mode_mesh.points = mesh.points + scale * shape
+        mode_mesh.point_data["Mode_Amplitude"] = np.linalg.norm(shape, axis=1)
+
+        plotter = pv.Plotter()
+        plotter.add_mesh(mode_mesh, scalars="Mode_Amplitude", show_edges=True, cmap="jet")
+        plotter.add_text(f"Mode {mode['mode']}: {mode['frequency_hz']:.1f} Hz ({mode['type']})", font_size=10)
+        plotter.show()
+
+    def play_mode_animation(self, mesh):
+        """
+        Oscillate the selected mode shape through one period.
+        """
+        import numpy as np
+        import pyvista as pv
+
+        shape, mode, scale = self.selected_mode(mesh)
+        amplitude = np.linalg.norm(shape, axis=1)
+        n_steps = 100
+
+        plotter = pv.Plotter()
+        display_mesh = mesh.copy()
+        display_mesh.point_data["Mode_Amplitude"] = amplitude
+        plotter.add_mesh(display_mesh, scalars="Mode_Amplitude", show_edges=True, cmap="jet", clim=[0, 1])
+        plotter.add_text(f"Mode {mode['mode']}: {mode['frequency_hz']:.1f} Hz ({mode['type']})", font_size=10)
+
+        # Every step rewrites the point and scalar arrays of display_mesh in place
+        points_initial = np.array(mesh.points)
+        frame_points = display_mesh.points
+        frame_amplitude = display_mesh.point_data["Mode_Amplitude"]
+
+        def update_frame(value):
+            phase = np.sin(2 * np.pi * int(value) / n_steps)
+            np.multiply(shape, phase * scale, out=frame_points)
+            frame_points += points_initial
+            np.multiply(amplitude, abs(phase), out=frame_amplitude)
+            display_mesh.GetPoints().Modified()
+            display_mesh.GetPointData().GetArray("Mode_Amplitude").Modified()
+            plotter.render()
+
+        plotter.add_slider_widget(callback=update_frame, rng=[0, n_steps], value=0, title='Phase Step',
+                                  pointa=(.025, .1), pointb=(.225, .1), style='modern')
+        plotter.show()
+
+    def load_result_mesh(self):
+        """
+        Build the PyVista mesh of the current result once and keep it for later clicks.
+        Solves hand their result over in memory; reopened past runs are read from the result store.
+        """
+        if self.result_mesh is not None:
+            return self.result_mesh
+
+        result_data = self.result_data
+        if result_data is None:
+            if not os.path.exists(self.result_file):
+                messagebox.showerror("File Not Found", f"Result file not found at {self.result_file}. Run FEA first.")
+                return None
+            from solver.result_io import ResultMesh, load_results
+
+            result = load_results(self.result_file)
+            result_data = ResultMesh(result["points"], result["cells"], result["point_data"])
+
+        import numpy as np
+        import pyvista as pv
+
+        cells = np.asarray(result_data.cells)
+        cell_type = pv.CellType.QUADRATIC_TETRA if cells.shape[1] == 10 else pv.CellType.TETRA
+        mesh = pv.UnstructuredGrid({cell_type: cells}, np.asarray(result_data.points))
+        for name, values in result_data.point_data.items():
+            mesh.point_data[name] = np.asarray(values)
+
+        self.result_mesh = mesh
+        return mesh
+
+    def play_animation(self):
+        mesh = self.load_result_mesh()
+        if mesh is None:
+            return
+        if self.modes:
+            self.play_mode_animation(mesh)
+            return
+        displacement = mesh.point_data.get("Displacement")
+        von_mises_final = mesh.point_data.get("Von_Mises")
+
+        if displacement is None or von_mises_final is None:
+            messagebox.showerror("Data Error", "Displacement or Von Mises data missing in the result.")
+            return
+
+        import numpy as np
+        import pyvista as pv
+
+        n_steps = 1000
+        displacement = np.array(displacement)
+        von_mises_final = np.array(von_mises_final)
+        max_vm = von_mises_final.max() if von_mises_final.size > 0 and von_mises_final.max() > 0 else 1.0
+
+        plotter = pv.Plotter()
+        display_mesh = mesh.copy()
+        display_mesh.point_data["Von_Mises"] = np.zeros_like(von_mises_final)
+        plotter.add_mesh(display_mesh, scalars="Von_Mises", show_edges=True, cmap="jet", clim=[0, max_vm])
+        plotter.add_scalar_bar(title="Von Mises Stress")
+
+        # Every slider step rewrites the point and scalar arrays of display_mesh in place,
+        # so dragging through the steps allocates nothing
+        points_initial = np.array(mesh.points)
+        frame_points = display_mesh.points
+        frame_von_mises = display_mesh.point_data["Von_Mises"]
+
+        def update_frame(value):
+            t = int(value) / (n_steps - 1)
+            np.multiply(displacement, t, out=frame_points)
+            frame_points += points_initial
+            np.multiply(von_mises_final, t, out=frame_von_mises)
+            display_mesh.GetPoints().Modified()
+            display_mesh.GetPointData().GetArray("Von_Mises").Modified()
+            plotter.render()
+
+        plotter.add_slider_widget(callback=update_frame,
+                                  rng=[0, n_steps - 1],
+                                  value=0,
+                                  title='Deformation Step',
+                                  pointa=(.025, .1),
+                                  pointb=(.225, .1),
+                                  style='modern')
+
+        plotter.show()
@@ -0,0 +1,163 @@
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Pipeline stages reported through the progress callback, in order
+STAGES = ("mesh", "assemble", "bc", "solve", "stress", "write")
+
+
+class StageRecorder:
+    """
+    Records wall time, CPU time and memory for consecutive pipeline stages,
+    plus free-form counters such as mesh statistics.
+
+    Peak RSS is the process high-water mark at the end of each stage. With
+    trace_memory=True the peak bytes allocated during each stage are measured
+    with tracemalloc as well, which slows down allocation-heavy Python code.
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.counters = {}
+        self._current = None
+        self._started_tracing = False
+
+    def start(self, name):
+        """
+        End the running stage, if any, and start timing stage name.
+        """
+        self.stop()
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+        self._current = (name, time.perf_counter(), time.process_time())
+
+    def stop(self):
+        if self._current is None:
+            return
+        name, wall_start, cpu_start = self._current
+        self._current = None
+
+        stats = {
+            "wall_s": time.perf_counter() - wall_start,
+            "cpu_s": time.process_time() - cpu_start,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        if self.trace_memory:
+            stats["peak_alloc_mb"] = tracemalloc.get_traced_memory()[1] / 1024**2
+        self.stages[name] = stats
+
+    @contextmanager
+    def stage(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def record(self, **counters):
+        self.counters.update(counters)
+
+    def finish(self):
+        self.stop()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def as_dict(self):
+        return {
+            "stages": self.stages,
+            "counters": self.counters,
+            "total_wall_s": sum(stats["wall_s"] for stats in self.stages.values()),
+            "total_cpu_s": sum(stats["cpu_s"] for stats in self.stages.values()),
+        }
+
+    def to_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def summary(self):
+        return format_stats(self.as_dict())
+
+
+class NullRecorder:
+    """
+    Stand-in for StageRecorder when instrumentation is disabled; every call is a no-op.
+    """
+
+    enabled = False
+
+    def start(self, name):
+        pass
+
+    def stop(self):
+        pass
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def record(self, **counters):
+        pass
+
+    def finish(self):
+        pass
+
+    def as_dict(self):
+        return None
+
+
+def make_recorder(params):
+    """
+    StageRecorder if params["instrument"] is set, otherwise a NullRecorder.
+    params["instrument_memory"] additionally enables tracemalloc.
+    """
+    if params.get("instrument", False):
+        return StageRecorder(trace_memory=params.get("instrument_memory", False))
+    return NullRecorder()
+
+
+def finish_stats(recorder, params, log=print, **counters):
+    """
+    Record counters (mesh and matrix statistics) on a finished recorder and return
+    its stats, or None if not instrumented. The timing summary is logged and the
+    stats are exported as JSON to params["stats_file"] if given.
+    """
+    recorder.record(**counters)
+    stats = recorder.as_dict()
+    if stats is not None:
+        log(f"[✓] Timing: {recorder.summary()}")
+        if params.get("stats_file"):
+            recorder.to_json(params["stats_file"])
+    return stats
+
+
+def format_stats(stats):
+    """
+    One-line human readable breakdown of StageRecorder.as_dict(), e.g. for a status bar.
+    """
+    parts = [f"{name} {stage['wall_s']:.2f}s" for name, stage in stats["stages"].items()]
+    return f"{stats['total_wall_s']:.2f} s total ({', '.join(parts)})"
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MiB, or None where unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
@@ -0,0 +1,165 @@
+import time
+from functools import partial
+
+import numpy as np
+import scipy.linalg
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+# Above this many unknowns "auto" switches from a sparse direct factorization
+# to preconditioned CG, whose memory use stays close to that of K itself.
+DIRECT_DOF_LIMIT = 150000
+
+BACKENDS = ("auto", "dense", "direct", "cholesky", "cg")
+PRECONDITIONERS = ("none", "jacobi", "ilu")
+
+
+def select_backend(num_dofs):
+    """
+    Pick a linear solver backend from the number of unknowns.
+    """
+    return "direct" if num_dofs <= DIRECT_DOF_LIMIT else "cg"
+
+
+def solve_linear_system(K, F, backend="auto", preconditioner="jacobi", tol=1e-10, maxiter=None):
+    """
+    Solve K U = F with the requested backend.
+    Returns U and an info dict with backend, iterations, relative residual and wall time.
+    """
+    factorization = Factorization(K, backend, preconditioner, tol, maxiter)
+    U, info = factorization.solve(F)
+    info["time"] += factorization.factor_time
+    return U, info
+
+
+class Factorization:
+    """
+    Factorization of K (or, for CG, its preconditioner) that is built once and
+    reused for any number of right-hand sides. F may be a vector or an (n, k) matrix.
+    K may also be a matrix-free LinearOperator with a diagonal() method, which
+    only the "cg" backend can solve.
+    """
+
+    def __init__(self, K, backend="auto", preconditioner="jacobi", tol=1e-10, maxiter=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Invalid solver backend '{backend}', expected one of {BACKENDS}")
+        matrix_free = isinstance(K, spla.LinearOperator)
+        if backend == "auto":
+            backend = "cg" if matrix_free else select_backend(K.shape[0])
+        if matrix_free and backend != "cg":
+            raise ValueError(f"Invalid solver backend '{backend}' for a matrix-free operator, expected 'cg'")
+
+        self.K = K
+        self.backend = backend
+        self.preconditioner = preconditioner if backend == "cg" else None
+        self.tol = tol
+        self.maxiter = maxiter
+
+        start = time.perf_counter()
+        if backend == "dense":
+            K_dense = K.toarray() if sp.issparse(K) else K
+            self._solve = partial(scipy.linalg.cho_solve, scipy.linalg.cho_factor(K_dense))
+        elif backend == "direct":
+            # K is SPD: keep the symmetric fill-reducing ordering by not pivoting, as for "ilu" below.
+            # Partial pivoting breaks it and makes the factorization several times slower,
+            # worst for the denser matrices of TET10 meshes.
+            self._solve = spla.splu(sp.csc_matrix(K), permc_spec="MMD_AT_PLUS_A", diag_pivot_thresh=0.0,
+                                    options={"SymmetricMode": True}).solve
+        elif backend == "cholesky":
+            self._solve = _cholesky_factor(K)
+        else:
+            if preconditioner not in PRECONDITIONERS:
+                raise ValueError(f"Invalid preconditioner '{preconditioner}', expected one of {PRECONDITIONERS}")
+            self.K = K if matrix_free else sp.csr_matrix(K)
+            self._M = build_preconditioner(self.K, preconditioner)
+        self.factor_time = time.perf_counter() - start
+
+    def solve(self, F):
+        """
+        Back-substitute (or iterate, for CG) for all columns of F.
+        Returns U with the shape of F and an info dict; iterations and residual
+        are the totals and the worst case over all right-hand sides.
+        """
+        info = {"backend": self.backend, "preconditioner": self.preconditioner, "iterations": 1}
+        start = time.perf_counter()
+
+        if self.backend == "cg":
+            columns = F.reshape(len(F), -1)
+            U = np.empty_like(columns)
+            info["iterations"] = 0
+            for j in range(columns.shape[1]):
+                U[:, j], iterations = self._solve_pcg(columns[:, j])
+                info["iterations"] += iterations
+            U = U.reshape(F.shape)
+        else:
+            U = self._solve(F)
+
+        info["time"] = time.perf_counter() - start
+        info["residual"] = _relative_residual(self.K, U, F)
+        return U, info
+
+    def inverse_operator(self):
+        """
+        K^-1 as a LinearOperator that back-substitutes (or iterates) without the
+        residual check of solve(), e.g. as the shift-invert operator of an eigensolver.
+        """
+        n = self.K.shape[0]
+        matvec = (lambda x: self._solve_pcg(x)[0]) if self.backend == "cg" else self._solve
+        return spla.LinearOperator((n, n), matvec=matvec, dtype=np.float64)
+
+    def _solve_pcg(self, F):
+        iterations = 0
+
+        def count(_):
+            nonlocal iterations
+            iterations += 1
+
+        U, status = spla.cg(self.K, F, rtol=self.tol, atol=0.0, maxiter=self.maxiter, M=self._M, callback=count)
+        if status > 0:
+            raise RuntimeError(f"CG did not converge to rtol={self.tol} within {iterations} iterations")
+        if status < 0:
+            raise RuntimeError("CG failed: illegal input or breakdown")
+        return U, iterations
+
+
+def _cholesky_factor(K):
+    """
+    Sparse Cholesky factorization through CHOLMOD (scikit-sparse).
+    """
+    try:
+        from sksparse.cholmod import cholesky
+    except ImportError as exc:
+        raise ImportError("The 'cholesky' backend requires scikit-sparse (pip install scikit-sparse)") from exc
+    return cholesky(sp.csc_matrix(K))
+
+
+def build_preconditioner(K, preconditioner, drop_tol=1e-5, fill_factor=20):
+    """
+    Build a preconditioner for CG as a LinearOperator, or None.
+    "jacobi" only needs K.diagonal() and so also works matrix-free;
+    drop_tol and fill_factor only apply to the incomplete LU factorization.
+    """
+    n = K.shape[0]
+    if preconditioner == "none":
+        return None
+    if preconditioner == "jacobi":
+        inv_diag = 1.0 / K.diagonal()
+        return spla.LinearOperator((n, n), matvec=lambda x: inv_diag * x)
+    if preconditioner == "ilu":
+        if not sp.issparse(K):
+            raise ValueError("The 'ilu' preconditioner needs an assembled matrix, use 'jacobi' or 'none'")
+        # Symmetric ordering without pivoting keeps the factors close to an incomplete Cholesky
+        ilu = spla.spilu(sp.csc_matrix(K), drop_tol=drop_tol, fill_factor=fill_factor,
+                         permc_spec="MMD_AT_PLUS_A", diag_pivot_thresh=0.0)
+        return spla.LinearOperator((n, n), matvec=ilu.solve)
+    raise ValueError(f"Invalid preconditioner '{preconditioner}', expected one of {PRECONDITIONERS}")
+
+
+def _relative_residual(K, U, F):
+    """
+    Largest relative residual over the columns of F.
+    """
+    F = F.reshape(len(F), -1)
+    norm_F = np.linalg.norm(F, axis=0)
+    norm_R = np.linalg.norm(F - K @ U.reshape(F.shape), axis=0)
+    return float(np.max(np.divide(norm_R, norm_F, out=np.zeros_like(norm_R), where=norm_F > 0)))
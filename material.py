@@ -1,5 +1,8 @@
 import numpy as np
 
+# Density of steel in kg/m^3, the default for modal analysis
+DEFAULT_DENSITY = 7850.0
+
 def get_elasticity_matrix(E, nu):
     factor = E / ((1 + nu) * (1 - 2 * nu))
     D = factor * np.array([
@@ -0,0 +1,298 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: index updates are not locked
+    fcntl = None
+
+from mesh.generate_mesh import generate_shaft_mesh
+
+DEFAULT_CACHE_DIR = "output/mesh_cache"
+DEFAULT_MAX_BYTES = 512 * 1024**2
+# Bump when the set or layout of cached arrays changes
+CACHE_FORMAT = 2
+
+
+class CacheIndex:
+    """
+    Index of a directory of cache entries, shared by MeshCache and
+    solver.result_store.ResultStore.
+
+    Each entry is a subdirectory named by its key, written under a scratch name
+    and published atomically, with its size and caller-defined info in
+    index.json. Lookups are counted as hits and misses in stats.json, and the
+    least recently used entries are evicted once their total size exceeds
+    max_bytes. An entry's last access is the mtime of its directory, so hits
+    don't rewrite the index. Every read-modify-write of index.json and
+    stats.json holds an exclusive lock on index.lock, so processes sharing the
+    directory don't lose each other's entries or counts.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def scratch_name(self):
+        """
+        A fresh name to write an entry under in cache_dir before publish().
+        """
+        return f".tmp-{uuid.uuid4().hex}"
+
+    def lookup(self, key):
+        """
+        Return the info of the entry for key, counting a hit and marking it as used,
+        or None on a miss.
+        """
+        # The index is replaced atomically, so it can be read without the lock
+        entry = self._read_index()["entries"].get(key)
+        if entry is not None:
+            try:
+                os.utime(self.entry_dir(key))
+            except OSError:  # Evicted by another process since the index was read
+                entry = None
+
+        if entry is None:
+            self.misses += 1
+            self._count("misses")
+        else:
+            self.hits += 1
+            self._count("hits")
+        return entry
+
+    def publish(self, key, tmp_dir, **info):
+        """
+        Move the entry written to tmp_dir into place under key, record it with info
+        and evict old entries if over budget.
+        """
+        size = sum(os.path.getsize(os.path.join(tmp_dir, name)) for name in os.listdir(tmp_dir))
+        with self._locked():
+            # Another process may have stored the entry first
+            try:
+                os.replace(tmp_dir, self.entry_dir(key))
+            except OSError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+            index = self._read_index()
+            index["entries"][key] = {**info, "size": size}
+            self._evict(index)
+            self._write_index(index)
+
+    def entries(self):
+        """
+        The info of every entry, by key.
+        """
+        return self._read_index()["entries"]
+
+    def stats(self):
+        """
+        Hit/miss counters of this instance and cumulative ones of the directory.
+        """
+        index = self._read_index()
+        counts = self._read_counts()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "total_hits": counts["hits"],
+            "total_misses": counts["misses"],
+            "entries": len(index["entries"]),
+            "bytes": sum(entry["size"] for entry in index["entries"].values()),
+        }
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _evict(self, index):
+        entries = index["entries"]
+        # Directories missing from the index (left by a writer that died, or by
+        # unlocked writers of older versions) would never be evicted
+        for name in os.listdir(self.cache_dir):
+            if name not in entries and not name.startswith(".") and os.path.isdir(self.entry_dir(name)):
+                shutil.rmtree(self.entry_dir(name), ignore_errors=True)
+
+        last_access = {}
+        for key in list(entries):
+            try:
+                last_access[key] = os.path.getmtime(self.entry_dir(key))
+            except OSError:  # Directory removed by hand
+                del entries[key]
+
+        total = sum(entry["size"] for entry in entries.values())
+        # Oldest first, but always keep the most recent entry
+        for key in sorted(entries, key=last_access.get)[:-1]:
+            if total <= self.max_bytes:
+                break
+            total -= entries.pop(key)["size"]
+            shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+            self.evictions += 1
+
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.cache_dir, "index.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield  # Closing the file releases the lock
+
+    def _count(self, name):
+        with self._locked():
+            counts = self._read_counts()
+            counts[name] += 1
+            _write_json(os.path.join(self.cache_dir, "stats.json"), counts)
+
+    def _read_counts(self):
+        return _read_json(os.path.join(self.cache_dir, "stats.json"), {"hits": 0, "misses": 0})
+
+    def _read_index(self):
+        return _read_json(os.path.join(self.cache_dir, "index.json"), {"entries": {}})
+
+    def _write_index(self, index):
+        _write_json(os.path.join(self.cache_dir, "index.json"), index)
+
+
+class MeshCache:
+    """
+    Content-addressed on-disk cache of shaft meshes.
+
+    Entries are keyed by a hash of the geometry parameters and the gmsh version and
+    store each array as a .npy file, so hits are memory-mapped instead of parsed.
+    The least recently used entries are evicted once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.index = CacheIndex(cache_dir, max_bytes)
+
+    def key(self, **geometry):
+        """
+        Hash of the geometry parameters, the gmsh version and the cache format.
+        """
+        payload = json.dumps({"geometry": geometry, "gmsh": gmsh_version(self.cache_dir), "format": CACHE_FORMAT},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Return the cached arrays for key as read-only memory maps, or None on a miss.
+        """
+        entry = self.index.lookup(key)
+        if entry is None:
+            return None
+        return {name: np.load(os.path.join(self.index.entry_dir(key), name + ".npy"), mmap_mode="r")
+                for name in entry["arrays"]}
+
+    def put(self, key, arrays, **info):
+        """
+        Store a dict of arrays under key and evict old entries if over budget.
+        """
+        tmp_dir = os.path.join(self.cache_dir, self.index.scratch_name())
+        os.makedirs(tmp_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, name + ".npy"), np.ascontiguousarray(array))
+        self.index.publish(key, tmp_dir, arrays=list(arrays), **info)
+
+    def stats(self):
+        """
+        Hit/miss counters of this instance and cumulative ones, see CacheIndex.stats.
+        """
+        return self.index.stats()
+
+    def clear(self):
+        self.index.clear()
+
+
+def _read_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, value):
+    # Written aside and renamed over path, so readers never see a partial file
+    tmp_path = f"{path}.{uuid.uuid4().hex}"
+    with open(tmp_path, "w") as f:
+        json.dump(value, f)
+    os.replace(tmp_path, path)
+
+
+@lru_cache(maxsize=None)
+def gmsh_version(cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Version of the gmsh that meshes: the Python bindings when they import, as
+    generate_shaft_mesh(in_process=True) then uses them, otherwise the gmsh
+    executable, or "unknown" if neither is available. The executable's answer is
+    memoized on disk per executable path, size and mtime, so cache lookups do
+    not have to start a gmsh process.
+    """
+    try:
+        import gmsh
+    except (ImportError, OSError, ValueError):  # Same fallback as generate_shaft_mesh
+        pass
+    else:
+        return f"api {gmsh.__version__}"
+
+    executable = shutil.which("gmsh")
+    if executable is None:
+        return "unknown"
+    stat = os.stat(executable)
+    fingerprint = f"{os.path.realpath(executable)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    memo_path = os.path.join(cache_dir, "gmsh_version.json")
+    memo = _read_json(memo_path, {})
+    if fingerprint in memo:
+        return memo[fingerprint]
+
+    try:
+        result = subprocess.run([executable, "-version"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    # gmsh prints its version on stderr
+    memo[fingerprint] = (result.stdout + result.stderr).strip()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_json(memo_path, memo)
+    return memo[fingerprint]
+
+
+def get_shaft_mesh(length=1.0, radius=0.05, element_size=None, cache=None, log=print, element_order=1):
+    """
+    Return (points, cells, face_nodes) for the shaft, meshing only on a cache miss.
+    element_order=2 gives quadratic TET10 cells.
+    Pass cache=False to always remesh.
+    """
+    if cache is None:
+        cache = MeshCache()
+
+    if cache:
+        key = cache.key(length=length, radius=radius, element_size=element_size, element_order=element_order)
+        arrays = cache.get(key)
+        if arrays is not None:
+            log(f"[✓] Mesh cache hit ({key[:12]})")
+            return arrays["points"], arrays["cells"], {"top": arrays["top_nodes"], "bottom": arrays["bottom_nodes"]}
+
+    points, cells, face_nodes = generate_shaft_mesh(length=length, radius=radius, element_size=element_size,
+                                                    in_process=True, log=log, element_order=element_order)
+
+    if cache:
+        cache.put(key, {"points": points, "cells": cells,
+                        "top_nodes": face_nodes["top"], "bottom_nodes": face_nodes["bottom"]},
+                  length=length, radius=radius, element_size=element_size, element_order=element_order)
+    return points, cells, face_nodes
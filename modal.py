@@ -0,0 +1,82 @@
+import numpy as np
+import scipy.sparse.linalg as spla
+
+from solver.linear_solver import Factorization
+
+# Bending modes in x and y whose frequencies differ by less than this (relative)
+# are one critical speed; on a faceted mesh the pair is only nearly degenerate
+DEGENERATE_TOLERANCE = 0.01
+
+
+def modal_analysis(K, M, num_modes=6, factorization=None):
+    """
+    Lowest num_modes eigenpairs of K phi = lambda M phi with shift-invert Lanczos
+    (ARPACK) around zero, so only num_modes vectors are iterated and K is
+    factorized once. factorization, a Factorization of K, is reused if given.
+    Returns the eigenvalues in ascending order and M-normalized mode vectors as
+    the columns of an array.
+    """
+    if num_modes >= K.shape[0]:
+        raise ValueError(f"Invalid num_modes {num_modes}, expected fewer than the {K.shape[0]} free DOFs")
+    if factorization is None:
+        factorization = Factorization(K)
+    eigenvalues, vectors = spla.eigsh(K, k=num_modes, M=M, sigma=0.0, which="LM",
+                                      OPinv=factorization.inverse_operator())
+    order = np.argsort(eigenvalues)
+    return eigenvalues[order], vectors[:, order]
+
+
+def classify_modes(points, modes, M):
+    """
+    Label each mode (a column of modes, over all 3 DOFs per node) "axial",
+    "torsional" or "bending" from where its kinetic energy goes: axial motion
+    along z, or in-plane motion that is mostly tangential about the shaft axis
+    (torsion) rather than a lateral shift of the cross-sections (bending).
+    """
+    nodal_mass = M.diagonal()[0::3]
+    x, y = points[:, 0], points[:, 1]
+    r = np.hypot(x, y)
+    on_axis = r == 0
+
+    types = []
+    for mode in modes.T:
+        u = mode.reshape(-1, 3)
+        axial = np.sum(nodal_mass * u[:, 2]**2)
+        in_plane = np.sum(nodal_mass * (u[:, 0]**2 + u[:, 1]**2))
+        tangential = np.divide(x * u[:, 1] - y * u[:, 0], r, out=np.zeros(len(r)), where=~on_axis)
+        # A lateral shift puts half of the in-plane energy in the tangential direction, a twist all of it
+        if axial > in_plane:
+            types.append("axial")
+        elif np.sum(nodal_mass * tangential**2) > 0.75 * in_plane:
+            types.append("torsional")
+        else:
+            types.append("bending")
+    return types
+
+
+def critical_speeds(frequencies, types):
+    """
+    Critical speeds in rpm: the bending natural frequencies of the non-rotating
+    shaft (no gyroscopic stiffening), with nearly degenerate x/y pairs merged.
+    """
+    speeds = []
+    for frequency, mode_type in zip(frequencies, types):
+        if mode_type != "bending":
+            continue
+        rpm = 60.0 * frequency
+        if speeds and abs(rpm - speeds[-1]) <= DEGENERATE_TOLERANCE * speeds[-1]:
+            continue
+        speeds.append(rpm)
+    return speeds
+
+
+def normalized_mode_shapes(modes):
+    """
+    Mode vectors as (N, 3) displacement fields scaled to a peak displacement of 1, for display.
+    """
+    shapes = []
+    for mode in modes.T:
+        u = mode.reshape(-1, 3)
+        peak = np.max(np.linalg.norm(u, axis=1))
+        shapes.append(u / peak if peak > 0 else u)
+    return shapes
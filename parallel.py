@@ -0,0 +1,223 @@
+import multiprocessing
+import os
+import queue
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+import scipy.sparse as sp
+
+from solver.fea_math import (compute_element_geometry, compute_element_stiffness_batch, compute_element_stress,
+                             element_dofs, element_weights)
+
+# Elements per task. Fixed rather than derived from the worker count, so that
+# the floating-point summation order, and with it every bit of the result, is
+# the same however many workers run the chunks.
+CHUNK_SIZE = 20000
+
+# Seconds to wait for every worker to import the solver and map the shared arrays
+STARTUP_TIMEOUT = 120.0
+
+# Seconds between checks that the workers are still alive while waiting on them
+POLL_INTERVAL = 0.1
+
+# Worker-side views of the shared arrays, set up once by _attach
+_shared = {}
+_blocks = []
+
+
+class ElementPool:
+    """
+    Worker processes that run the per-element loops of stiffness assembly and
+    stress recovery over fixed chunks of cells.
+
+    points, cells and the displacement and element stress buffers live in shared
+    memory that every worker maps once at startup, so a task only carries its
+    chunk bounds and D. Partial results are merged in chunk order. With
+    workers=1 the same chunks run in-process, giving identical results.
+    A worker that dies, at startup or during a task, fails the call with
+    RuntimeError instead of leaving it waiting.
+    Call close() (or use as a context manager) to stop the workers and free the
+    shared memory.
+    """
+
+    def __init__(self, points, cells, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.num_nodes = len(points)
+        self.num_elements = len(cells)
+
+        self._blocks = []
+        self._arrays = {}
+        self._descriptors = {}
+        self._allocate("points", points.shape, np.float64)[:] = points
+        self._allocate("cells", cells.shape, cells.dtype)[:] = cells
+        self._allocate("U", (self.num_nodes * 3,), np.float64)
+        # TET10 stresses are recovered at the element nodes
+        stress_shape = (self.num_elements, 6) if cells.shape[1] == 4 else (self.num_elements, cells.shape[1], 6)
+        self._allocate("stress", stress_shape, np.float64)
+        self._allocate("valid", (self.num_elements,), np.bool_)
+
+        self._processes = []
+        if self.workers > 1:
+            context = multiprocessing.get_context("spawn")
+            self._tasks = context.Queue()
+            self._results = context.Queue()
+            try:
+                for _ in range(self.workers):
+                    process = context.Process(target=_worker, args=(self._descriptors, self._tasks, self._results),
+                                              daemon=True)
+                    process.start()
+                    self._processes.append(process)
+                # Wait for every worker to start up, so startup isn't timed as part of the first stage
+                self._receive(self.workers, "startup", time.monotonic() + STARTUP_TIMEOUT)
+            except BaseException:
+                self._stop_workers(terminate=True)
+                self.close()
+                raise
+
+    def stiffness(self, D):
+        """
+        Assemble the global stiffness matrix as CSR. Each task returns the COO
+        triplets of its chunk with duplicates already summed.
+        """
+        num_dofs = self.num_nodes * 3
+        parts = self._map(_stiffness_chunk, D)
+        rows = np.concatenate([part[0] for part in parts])
+        cols = np.concatenate([part[1] for part in parts])
+        data = np.concatenate([part[2] for part in parts])
+        return sp.coo_matrix((data, (rows, cols)), shape=(num_dofs, num_dofs)).tocsr()
+
+    def element_stress(self, U, D):
+        """
+        Stress in every element, shape (num_elements, 6) or (num_elements, 10, 6) for
+        TET10, and a mask of the non-degenerate elements, as for compute_element_stress.
+        """
+        self._arrays["U"][:] = U
+        self._map(_stress_chunk, D)
+        return self._arrays["stress"].copy(), self._arrays["valid"].copy()
+
+    def _receive(self, count, what, deadline=None):
+        # Results of the workers in arrival order. The workers are owned processes,
+        # so one that dies without reporting is noticed from its handle.
+        results = []
+        while len(results) < count:
+            try:
+                index, value, error = self._results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                dead = [process for process in self._processes if not process.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Element pool {what} failed: worker process exited with code "
+                                       f"{dead[0].exitcode}")
+                if deadline is not None and time.monotonic() > deadline:
+                    raise RuntimeError(f"Element pool {what} failed: {count - len(results)} worker(s) not ready "
+                                       f"after {STARTUP_TIMEOUT:.0f} s")
+                continue
+            if error is not None:
+                raise RuntimeError(f"Element pool {what} failed in a worker:\n{error}")
+            results.append((index, value))
+        return results
+
+    def close(self):
+        self._stop_workers()
+        self._arrays.clear()  # Views must be released before the blocks can be closed
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def _stop_workers(self, terminate=False):
+        if not self._processes:
+            return
+        if terminate:
+            # Tasks still queued for the killed workers must not keep this process alive at exit
+            self._tasks.cancel_join_thread()
+            for process in self._processes:
+                process.terminate()
+        else:
+            for _ in self._processes:
+                self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._tasks.close()
+        self._results.close()
+        self._processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _allocate(self, name, shape, dtype):
+        dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        block = shared_memory.SharedMemory(create=True, size=size)
+        self._blocks.append(block)
+        self._descriptors[name] = (block.name, shape, dtype.str)
+        self._arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        return self._arrays[name]
+
+    def _map(self, task, *args):
+        chunks = [(start, min(start + CHUNK_SIZE, self.num_elements))
+                  for start in range(0, self.num_elements, CHUNK_SIZE)]
+        if not self._processes:
+            return [task(self._arrays, start, stop, *args) for start, stop in chunks]
+        for index, (start, stop) in enumerate(chunks):
+            self._tasks.put((index, task, start, stop, args))
+        try:
+            results = self._receive(len(chunks), "task")
+        except BaseException:
+            # Leftover tasks and results would mix into the next call, so the workers go
+            self._stop_workers(terminate=True)
+            raise
+        # Put the results back in chunk order whichever worker finished first
+        return [value for _, value in sorted(results, key=lambda result: result[0])]
+
+
+def _worker(descriptors, tasks, results):
+    # Map the shared arrays once, report, then run (index, task, start, stop, args)
+    # items until the None sentinel. Failures are reported with their traceback.
+    try:
+        for name, (block_name, shape, dtype) in descriptors.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            _blocks.append(block)
+            _shared[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    except Exception:
+        results.put((None, None, traceback.format_exc()))
+        return
+    results.put((None, os.getpid(), None))
+
+    for item in iter(tasks.get, None):
+        index, task, start, stop, args = item
+        try:
+            results.put((index, task(_shared, start, stop, *args), None))
+        except Exception:
+            results.put((index, None, traceback.format_exc()))
+
+
+def _stiffness_chunk(arrays, start, stop, D):
+    points, cells = arrays["points"], arrays["cells"][start:stop]
+    num_dofs = len(points) * 3
+    index_dtype = np.int32 if num_dofs < np.iinfo(np.int32).max else np.int64
+
+    geometry = compute_element_geometry(points, cells)
+    ke = compute_element_stiffness_batch(geometry.B, element_weights(geometry), D)
+    dofs = element_dofs(cells).astype(index_dtype)
+    rows = np.repeat(dofs, dofs.shape[1], axis=1).ravel()
+    cols = np.tile(dofs, (1, dofs.shape[1])).ravel()
+
+    # Sum duplicates within the chunk to shrink what is sent back and merged
+    K = sp.coo_matrix((ke.ravel(), (rows, cols)), shape=(num_dofs, num_dofs)).tocsr().tocoo()
+    return K.row.astype(index_dtype), K.col.astype(index_dtype), K.data
+
+
+def _stress_chunk(arrays, start, stop, D):
+    points, cells = arrays["points"], arrays["cells"][start:stop]
+    geometry = compute_element_geometry(points, cells)
+    _, stress = compute_element_stress(cells, arrays["U"], D, geometry)
+    arrays["stress"][start:stop] = stress
+    arrays["valid"][start:stop] = geometry.volumes > 0
@@ -0,0 +1,112 @@
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+# "vtk": legacy VTK, binary          "vtu": VTK XML, binary + zlib
+# "xdmf": XDMF with HDF5 heavy data  "npz": single NumPy archive
+# "npy": directory of raw .npy arrays that load_results memory-maps
+OUTPUT_FORMATS = ("vtk", "vtu", "xdmf", "npz", "npy")
+
+_EXTENSIONS = {"vtk": ".vtk", "vtu": ".vtu", "xdmf": ".xdmf", "npz": ".npz", "npy": ""}
+
+ResultMesh = namedtuple("ResultMesh", ["points", "cells", "point_data"])
+ResultMesh.__doc__ = """
+A result held in memory: the undeformed points (N, 3), the cells and a dict of
+point data such as "Displacement" and "Von_Mises", as written by write_results.
+Solvers return it under "result_mesh", so callers can use the result without
+reading the output file back.
+"""
+
+
+def write_results(output_dir, points, cells, point_data, params, fmt="vtu", name="deformed_shaft", summary=None):
+    """
+    Write a result mesh with its point data in the given format. points are the
+    undeformed ones; viewers warp them by the "Displacement" point data.
+    The input params (and optional summary metrics) are stored alongside, so the
+    result is self-describing. Returns the path of the written file or directory.
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Invalid output format '{fmt}', expected one of {OUTPUT_FORMATS}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, name + _EXTENSIONS[fmt])
+    metadata = {"format": fmt, "params": params, "summary": summary or {}}
+
+    if fmt == "npz":
+        np.savez(path, points=points, cells=cells, metadata=json.dumps(metadata, default=str),
+                 **{"point_data/" + key: value for key, value in point_data.items()})
+    elif fmt == "npy":
+        os.makedirs(path, exist_ok=True)
+        arrays = {"points": points, "cells": cells, **{"point_data." + key: value for key, value in point_data.items()}}
+        for key, value in arrays.items():
+            np.save(os.path.join(path, key + ".npy"), np.ascontiguousarray(value))
+        metadata["point_data"] = list(point_data)
+        with open(os.path.join(path, "metadata.json"), "w") as f:
+            json.dump(metadata, f, indent=2, default=str)
+    else:
+        import meshio
+
+        cell_type = "tetra10" if cells.shape[1] == 10 else "tetra"
+        mesh = meshio.Mesh(points=points, cells={cell_type: cells}, point_data=point_data)
+        if fmt == "vtk":
+            meshio.write(path, mesh, file_format="vtk", binary=True)
+        elif fmt == "vtu":
+            meshio.write(path, mesh, file_format="vtu", binary=True, compression="zlib")
+        else:
+            meshio.write(path, mesh, file_format="xdmf", data_format="HDF")
+        with open(_metadata_path(path), "w") as f:
+            json.dump(metadata, f, indent=2, default=str)
+
+    return path
+
+
+def load_results(path, mmap=True):
+    """
+    Read a result written by write_results.
+    Returns a dict with points, cells, point_data and metadata (None if missing).
+    Arrays of the "npy" layout are memory-mapped unless mmap is False.
+    """
+    if os.path.isdir(path):
+        with open(os.path.join(path, "metadata.json")) as f:
+            metadata = json.load(f)
+        mmap_mode = "r" if mmap else None
+
+        def load(key):
+            return np.load(os.path.join(path, key + ".npy"), mmap_mode=mmap_mode)
+
+        return {
+            "points": load("points"),
+            "cells": load("cells"),
+            "point_data": {key: load("point_data." + key) for key in metadata["point_data"]},
+            "metadata": metadata,
+        }
+
+    if path.endswith(".npz"):
+        with np.load(path) as archive:
+            return {
+                "points": archive["points"],
+                "cells": archive["cells"],
+                "point_data": {key.split("/", 1)[1]: archive[key] for key in archive.files
+                               if key.startswith("point_data/")},
+                "metadata": json.loads(str(archive["metadata"])),
+            }
+
+    import meshio
+
+    mesh = meshio.read(path)
+    metadata = None
+    if os.path.exists(_metadata_path(path)):
+        with open(_metadata_path(path)) as f:
+            metadata = json.load(f)
+    return {
+        "points": mesh.points,
+        "cells": mesh.cells_dict["tetra10"] if "tetra10" in mesh.cells_dict else mesh.cells_dict["tetra"],
+        "point_data": dict(mesh.point_data),
+        "metadata": metadata,
+    }
+
+
+def _metadata_path(path):
+    return os.path.splitext(path)[0] + ".json"
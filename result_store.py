@@ -0,0 +1,177 @@
+import hashlib
+import json
+import numbers
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from solver.result_io import ResultMesh, load_results, write_results
+from mesh import mesh_cache
+from mesh.mesh_cache import CacheIndex, gmsh_version
+
+DEFAULT_STORE_DIR = "output/result_store"
+DEFAULT_MAX_BYTES = 1024**3
+# Bump when the layout of stored entries changes
+STORE_FORMAT = 2
+
+# Params that only change where or how a result is written or timed, not its values.
+# A cached mesh equals a fresh one. Pool runs are bitwise identical for any worker
+# count, but may differ from the serial loops in the last bits, so the key records
+# whether a pool ran (see ResultStore.key) rather than the worker count.
+IGNORED_PARAMS = ("output_dir", "output_format", "instrument", "instrument_memory", "stats_file", "workers",
+                  "mesh_cache", "result_store", "result_store_dir")
+
+# Entries of a result dict that are not kept in the index: those that describe one
+# particular run, and the result arrays, which are stored as files
+RUN_ENTRIES = ("output_file", "recomputed", "store_key", "result_mesh")
+
+
+class ResultStore:
+    """
+    Persistent store of solved configurations.
+
+    Entries are keyed by a hash of the canonical params and the code version, and
+    hold the result mesh and point data in the "npy" layout of solver.result_io,
+    so a stored result is reopened with load_results (memory-mapped) like any
+    result file. The index keeps the params and summary metrics of every entry
+    for query(). Eviction and hit/miss counting are those of the mesh cache, see
+    mesh.mesh_cache.CacheIndex.
+    """
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.store_dir = store_dir
+        self.index = CacheIndex(store_dir, max_bytes)
+
+    def key(self, params):
+        """
+        Hash of the canonical params, whether the element loops ran on a worker
+        pool, the code version and the store format.
+        """
+        payload = json.dumps({"params": canonical_params(params), "pool": params.get("workers") is not None,
+                              "code": code_version(), "gmsh": gmsh_version(), "format": STORE_FORMAT},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Return the stored result dict for key, with "output_file" pointing at the
+        stored result, its arrays memory-mapped under "result_mesh" and
+        "recomputed" empty, or None on a miss.
+        """
+        entry = self.index.lookup(key)
+        if entry is None:
+            return None
+        entry_dir = self.index.entry_dir(key)
+        data = load_results(entry_dir)
+        return {**entry["result"], "output_file": entry_dir, "recomputed": [], "store_key": key,
+                "result_mesh": ResultMesh(data["points"], data["cells"], data["point_data"])}
+
+    def put(self, key, params, result):
+        """
+        Store the result dict of a solve of params, with its "result_mesh" arrays,
+        and evict old entries if over budget.
+        """
+        points, cells, point_data = result["result_mesh"]
+        summary = _jsonable({name: value for name, value in result.items() if name not in RUN_ENTRIES})
+
+        tmp_dir = write_results(self.store_dir, points, cells, point_data, canonical_params(params), "npy",
+                                name=self.index.scratch_name(), summary=summary)
+        self.index.publish(key, tmp_dir, params=canonical_params(params), result=summary, created=time.time())
+
+    def query(self, conditions=None, **more):
+        """
+        Stored runs whose params match every condition, newest first. Conditions
+        map a param name, or a dotted path into nested params such as
+        "load_value.axial", to a value or to a (low, high) range with either bound
+        None for open, e.g. query({"load_value.axial": (500, None)}, E=(1e11, 3e11),
+        load_type="axial"). Returns dicts with key, params, result, created and the
+        output_file to reopen. Querying does not count as an access for eviction.
+        """
+        conditions = {**(conditions or {}), **more}
+        runs = []
+        for key, entry in self.index.entries().items():
+            if all(_matches(_lookup(entry["params"], name), condition) for name, condition in conditions.items()):
+                runs.append({"key": key, "params": entry["params"], "result": entry["result"],
+                             "created": entry["created"], "output_file": self.index.entry_dir(key)})
+        return sorted(runs, key=lambda run: run["created"], reverse=True)
+
+    def stats(self):
+        """
+        Hit/miss counters of this instance and cumulative ones, see CacheIndex.stats.
+        """
+        return self.index.stats()
+
+    def clear(self):
+        self.index.clear()
+
+
+def open_result_store(params):
+    """
+    The ResultStore in params["result_store_dir"] (default output/result_store),
+    or None if params["result_store"] is False.
+    """
+    if not params.get("result_store", True):
+        return None
+    return ResultStore(params.get("result_store_dir", DEFAULT_STORE_DIR))
+
+
+def canonical_params(params):
+    """
+    params without IGNORED_PARAMS, with sorted keys and every number as a float,
+    so e.g. {"E": 2e11} and {"E": 200000000000} describe the same configuration.
+    """
+    return _canonical({name: value for name, value in params.items() if name not in IGNORED_PARAMS})
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """
+    Hash of the source of the solver and mesh modules, so results of different
+    code never match. Computed once per process.
+    """
+    digest = hashlib.sha256()
+    for package_dir in sorted({os.path.dirname(os.path.abspath(__file__)),
+                               os.path.dirname(os.path.abspath(mesh_cache.__file__))}):
+        for name in sorted(os.listdir(package_dir)):
+            if name.endswith(".py"):
+                with open(os.path.join(package_dir, name), "rb") as f:
+                    digest.update(name.encode())
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {str(name): _canonical(item) for name, item in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, numbers.Real):
+        return float(value)
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _jsonable(value):
+    # Result dicts hold NumPy scalars and arrays in places (solver info, stats)
+    return json.loads(json.dumps(value, default=lambda item: item.tolist() if hasattr(item, "tolist") else str(item)))
+
+
+def _lookup(params, name):
+    value = params
+    for part in name.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _matches(value, condition):
+    if isinstance(condition, tuple):
+        low, high = condition
+        return isinstance(value, float) and (low is None or value >= low) and (high is None or value <= high)
+    return value == _canonical(condition)
@@ -0,0 +1,70 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from solver.fea_math import TET10_EDGES
+from solver.material import get_elasticity_matrix
+
+LENGTH = 0.06
+WIDTH = 0.02
+
+
+def box_mesh(n=3):
+    """
+    Structured tet mesh of a WIDTH x WIDTH x LENGTH box, n x n x 3n cubes each
+    split into the 6 tetrahedra around its main diagonal, which match across
+    neighbouring cubes. Every tet is positively oriented. Returns points, cells
+    and face_nodes with the "top" (z = LENGTH) and "bottom" (z = 0) node indices.
+    """
+    shape = (n + 1, n + 1, 3 * n + 1)
+    grid = np.meshgrid(*(np.linspace(0.0, size, count) for size, count in zip((WIDTH, WIDTH, LENGTH), shape)),
+                       indexing="ij")
+    points = np.column_stack([axis.ravel() for axis in grid])
+    index = np.arange(len(points)).reshape(shape)
+
+    corners = np.array(list(itertools.product(range(n), range(n), range(3 * n))))
+    cells = []
+    for order in itertools.permutations(range(3)):
+        # Walk from the cube's low corner to its high corner one axis at a time
+        path = [np.zeros(3, dtype=int)]
+        for axis in order:
+            path.append(path[-1] + np.eye(3, dtype=int)[axis])
+        cells.append(np.column_stack([index[tuple((corners + step).T)] for step in path]))
+    cells = np.concatenate(cells)
+
+    edges = points[cells[:, 1:]] - points[cells[:, :1]]
+    negative = np.linalg.det(edges) < 0
+    cells[negative] = cells[negative][:, [0, 2, 1, 3]]
+
+    z = points[:, 2]
+    return points, cells, {"top": np.flatnonzero(np.isclose(z, LENGTH)), "bottom": np.flatnonzero(z == 0.0)}
+
+
+def elevate(points, cells):
+    """
+    TET10 mesh with a midside node on every edge of the linear mesh (points, cells).
+    """
+    edges = np.sort(cells[:, TET10_EDGES].reshape(-1, 2), axis=1)
+    unique_edges, edge_index = np.unique(edges, axis=0, return_inverse=True)
+    midpoints = points[unique_edges].mean(axis=1)
+    cells10 = np.hstack([cells, len(points) + edge_index.reshape(len(cells), 6)])
+    return np.vstack([points, midpoints]), cells10
+
+
+@pytest.fixture(params=[1, 2], ids=["tet4", "tet10"])
+def mesh(request):
+    """
+    (points, cells, face_nodes) of the box, with linear or quadratic elements.
+    """
+    points, cells, face_nodes = box_mesh()
+    if request.param == 2:
+        points, cells = elevate(points, cells)
+        z = points[:, 2]
+        face_nodes = {"top": np.flatnonzero(np.isclose(z, LENGTH)), "bottom": np.flatnonzero(z == 0.0)}
+    return points, cells, face_nodes
+
+
+@pytest.fixture
+def D():
+    return get_elasticity_matrix(2e11, 0.3)
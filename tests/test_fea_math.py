@@ -0,0 +1,105 @@
+import numpy as np
+import scipy.sparse.linalg as spla
+
+from solver.boundary import fixed_face_dofs
+from solver.fea_math import (ElementStiffnessOperator, apply_boundary_conditions, assemble_global_stiffness,
+                             assemble_global_stiffness_sparse, compute_element_geometry, compute_element_stress)
+
+
+def rigid_body_modes(points):
+    """
+    The 6 rigid body displacement fields of points as columns of a (3N, 6) array.
+    """
+    x, y, z = (points - points.mean(axis=0)).T
+    zero, one = np.zeros(len(points)), np.ones(len(points))
+    fields = [
+        (one, zero, zero), (zero, one, zero), (zero, zero, one),
+        (zero, -z, y), (z, zero, -x), (-y, x, zero),
+    ]
+    return np.column_stack([np.column_stack(field).ravel() for field in fields])
+
+
+def test_sparse_assembly_matches_dense(mesh, D):
+    points, cells, _ = mesh
+    K_dense = assemble_global_stiffness(points, cells, D)
+    K_sparse = assemble_global_stiffness_sparse(points, cells, D, chunk_size=100)
+
+    np.testing.assert_allclose(K_sparse.toarray(), K_dense, rtol=1e-12, atol=1e-12 * np.abs(K_dense).max())
+
+
+def test_matrix_free_matches_assembled(mesh, D):
+    points, cells, face_nodes = mesh
+    geometry = compute_element_geometry(points, cells)
+    K = assemble_global_stiffness_sparse(points, cells, D, geometry)
+    operator = ElementStiffnessOperator(cells, D, geometry, len(points) * 3, chunk_size=100)
+    u = np.random.default_rng(0).standard_normal(len(points) * 3)
+
+    np.testing.assert_allclose(operator @ u, K @ u, rtol=1e-10, atol=1e-10 * np.abs(K @ u).max())
+    np.testing.assert_allclose(operator.diagonal(), K.diagonal(), rtol=1e-12)
+
+    fixed = fixed_face_dofs(face_nodes["bottom"])
+    K_reduced, _, free = apply_boundary_conditions(K, np.zeros(len(u)), fixed)
+    operator_reduced, _, operator_free = apply_boundary_conditions(operator, np.zeros(len(u)), fixed)
+    np.testing.assert_array_equal(operator_free, free)
+    np.testing.assert_allclose(operator_reduced @ u[free], K_reduced @ u[free], rtol=1e-10,
+                               atol=1e-10 * np.abs(K_reduced @ u[free]).max())
+
+
+def test_eliminate_matches_reduce(mesh, D):
+    points, cells, face_nodes = mesh
+    K = assemble_global_stiffness_sparse(points, cells, D)
+    F = np.zeros(len(points) * 3)
+    F[face_nodes["top"] * 3 + 2] = 1000.0 / len(face_nodes["top"])
+    F[face_nodes["top"] * 3 + 0] = 300.0 / len(face_nodes["top"])
+    fixed = fixed_face_dofs(face_nodes["bottom"])
+
+    K_reduced, F_reduced, free = apply_boundary_conditions(K, F, fixed, "reduce")
+    U_reduce = np.zeros(len(F))
+    U_reduce[free] = spla.spsolve(K_reduced.tocsc(), F_reduced)
+
+    # "eliminate" works in place, so give it its own copy of K
+    K_eliminated, F_eliminated, all_dofs = apply_boundary_conditions(K.copy(), F, fixed, "eliminate")
+    assert len(all_dofs) == len(F)
+    U_eliminate = spla.spsolve(K_eliminated.tocsc(), F_eliminated)
+
+    np.testing.assert_array_equal(U_eliminate[fixed], 0.0)
+    np.testing.assert_allclose(U_eliminate, U_reduce, rtol=1e-9, atol=1e-9 * np.abs(U_reduce).max())
+
+
+def test_rigid_body_modes_are_stress_free(mesh, D):
+    points, cells, _ = mesh
+    geometry = compute_element_geometry(points, cells)
+    K = assemble_global_stiffness_sparse(points, cells, D, geometry)
+    modes = rigid_body_modes(points)
+
+    forces = K @ modes
+    assert np.abs(forces).max() <= 1e-9 * np.abs(K).max() * np.abs(modes).max()
+    for mode in modes.T:
+        _, stress = compute_element_stress(cells, mode, D, geometry)
+        assert np.abs(stress).max() <= 1e-9 * np.abs(D).max() * np.abs(mode).max() / np.ptp(points)
+
+
+def test_patch_test_reproduces_linear_field(mesh, D):
+    # Prescribe a linear displacement on the boundary; the unloaded interior must
+    # follow it exactly and every element must carry the same constant stress
+    points, cells, _ = mesh
+    gradient = np.array([[1.0, 0.3, -0.2], [0.5, -0.4, 0.1], [0.2, 0.6, 0.8]]) * 1e-4
+    U_exact = (points @ gradient.T + np.array([1e-5, -2e-5, 3e-5])).ravel()
+
+    lower, upper = points.min(axis=0), points.max(axis=0)
+    on_boundary = np.any(np.isclose(points, lower) | np.isclose(points, upper), axis=1)
+    assert not on_boundary.all()
+    fixed = fixed_face_dofs(np.flatnonzero(on_boundary))
+
+    geometry = compute_element_geometry(points, cells)
+    K = assemble_global_stiffness_sparse(points, cells, D, geometry)
+    free = np.setdiff1d(np.arange(len(U_exact)), fixed)
+    U = U_exact.copy()
+    U[free] = spla.spsolve(K[free][:, free].tocsc(), -K[free][:, fixed] @ U_exact[fixed])
+
+    np.testing.assert_allclose(U, U_exact, rtol=0, atol=1e-10 * np.abs(U_exact).max())
+    strain = np.array([gradient[0, 0], gradient[1, 1], gradient[2, 2], gradient[0, 1] + gradient[1, 0],
+                       gradient[1, 2] + gradient[2, 1], gradient[2, 0] + gradient[0, 2]])
+    _, stress = compute_element_stress(cells, U, D, geometry)
+    np.testing.assert_allclose(stress.reshape(-1, 6), np.broadcast_to(D @ strain, stress.reshape(-1, 6).shape),
+                               rtol=0, atol=1e-8 * np.abs(D @ strain).max())
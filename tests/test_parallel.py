@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from solver import parallel
+from solver.fea_math import assemble_global_stiffness_sparse, compute_element_geometry, compute_element_stress
+from solver.parallel import ElementPool
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Several chunks per mesh, so workers really split the element loops
+    monkeypatch.setattr(parallel, "CHUNK_SIZE", 50)
+
+
+def pool_results(points, cells, D, U, workers):
+    with ElementPool(points, cells, workers) as pool:
+        return pool.stiffness(D), pool.element_stress(U, D)
+
+
+def test_pool_is_bitwise_identical_for_any_worker_count(mesh, D, small_chunks):
+    points, cells, _ = mesh
+    U = np.random.default_rng(0).standard_normal(len(points) * 3) * 1e-6
+    K_serial, (stress_serial, valid_serial) = pool_results(points, cells, D, U, workers=1)
+
+    for workers in (2, 3):
+        K, (stress, valid) = pool_results(points, cells, D, U, workers)
+        np.testing.assert_array_equal(K.indptr, K_serial.indptr)
+        np.testing.assert_array_equal(K.indices, K_serial.indices)
+        np.testing.assert_array_equal(K.data, K_serial.data)
+        np.testing.assert_array_equal(stress, stress_serial)
+        np.testing.assert_array_equal(valid, valid_serial)
+
+
+def test_pool_matches_serial_assembly(mesh, D, small_chunks):
+    points, cells, _ = mesh
+    U = np.random.default_rng(1).standard_normal(len(points) * 3) * 1e-6
+    K, (stress, valid) = pool_results(points, cells, D, U, workers=2)
+
+    geometry = compute_element_geometry(points, cells)
+    K_serial = assemble_global_stiffness_sparse(points, cells, D, geometry)
+    _, stress_serial = compute_element_stress(cells, U, D, geometry)
+    assert abs(K - K_serial).max() <= 1e-12 * abs(K_serial).max()
+    np.testing.assert_allclose(stress, stress_serial, rtol=1e-12, atol=1e-12 * np.abs(stress_serial).max())
+    np.testing.assert_array_equal(valid, geometry.volumes > 0)
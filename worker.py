@@ -0,0 +1,113 @@
+import multiprocessing
+import queue
+
+
+class SolverWorker:
+    """
+    Runs solves in a separate, long-lived process so the caller (the GUI)
+    never blocks. The process keeps one ShaftModel session alive, so a submit()
+    that only changes e.g. the load or E reuses the mesh, stiffness and
+    factorization of the previous solve. Progress arrives as events from poll():
+
+        ("stage", name)    a pipeline stage from instrumentation.STAGES started
+        ("log", message)   a log line
+        ("done", result)   the solve finished; result is the return value of ShaftModel.solve
+                           (or solve_modal, for params["analysis"] = "modal"), or the stored
+                           result of the same params from the result store
+        ("error", message) the solve raised
+
+    cancel() terminates the process, which stops the work immediately even inside
+    a factorization; a fresh process, with an empty session, is started for the
+    next submit().
+    """
+
+    def __init__(self):
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._requests = None
+        self._events = None
+        self.busy = False
+
+    def submit(self, params):
+        if self.busy:
+            raise RuntimeError("A solve is already running")
+        self.start()
+        self.busy = True
+        self._requests.put(params)
+
+    def start(self):
+        """
+        Start the solver process if it is not running. submit() does this on demand;
+        calling it early lets the process import the solver in the background.
+        """
+        if self._process is None or not self._process.is_alive():
+            self._start()
+
+    def poll(self):
+        """
+        Return all events received since the last call, without blocking.
+        """
+        events = []
+        if self._events is None:
+            return events
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            events.append(event)
+            if event[0] in ("done", "error"):
+                self.busy = False
+
+        if self.busy and not self._process.is_alive():
+            self.busy = False
+            events.append(("error", f"Solver process exited unexpectedly (code {self._process.exitcode})"))
+        return events
+
+    def cancel(self):
+        if self._process is not None and self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._process = None
+        self.busy = False
+
+    def shutdown(self):
+        if self._process is not None and self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout=1.0)
+        self.cancel()
+
+    def _start(self):
+        self._requests = self._context.Queue()
+        self._events = self._context.Queue()
+        self._process = self._context.Process(target=_worker_main, args=(self._requests, self._events), daemon=True)
+        self._process.start()
+
+
+def _worker_main(requests, events):
+    from solver.fea_solver import ShaftModel, solve_analysis, solve_stored, use_axisymmetric
+
+    model = None
+
+    def progress(kind, value):
+        events.put((kind, value))
+
+    def solve(params):
+        nonlocal model
+        modal = params.get("analysis", "static") == "modal"
+        if not modal and (params.get("adaptive", False) or use_axisymmetric(params)):
+            # Adaptive runs remesh every iteration and 2D solves are cheap; neither uses the session
+            return solve_analysis(params, progress=progress)
+        if model is None:
+            model = ShaftModel(params)
+        else:
+            model.update(params)
+        return model.solve_modal(progress=progress) if modal else model.solve(progress=progress)
+
+    for params in iter(requests.get, None):
+        try:
+            result = solve_stored(params, lambda: solve(params), progress)
+        except Exception as e:
+            events.put(("error", str(e)))
+        else:
+            events.put(("done", result))